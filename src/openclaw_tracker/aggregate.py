@@ -0,0 +1,201 @@
+"""Parallel map-reduce aggregation over partitioned host JSONL dumps.
+
+Aggregation runs in three stages, each spread across a process pool:
+
+1. **Map** — input files are split into newline-aligned byte ranges. Each
+   worker parses its range and writes one compact TSV shard per partition
+   (``query, ip, port, country, city``), routing every host by a stable
+   hash of its IP or by its country code.
+2. **Partition reduce** — each partition's shards are read by one worker,
+   hosts are deduplicated per ``(query, ip, port)`` and counted.
+   Partitioning by IP guarantees that duplicates of a host always land in
+   the same partition, so the per-partition dedup is exact.
+3. **Final reduce** — the small per-partition counters are summed and
+   turned into a ScanResult.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import zlib
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .models import CityCount, CountryCount, QueryResult, ScanResult
+from .shodan_query import country_name, merge_query_results
+
+PARTITION_KEYS = ("ip", "country")
+
+# Bounds on a map task's byte range; within them, input is split evenly
+# across the workers.
+_MIN_CHUNK_BYTES = 1024 * 1024
+_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Separates the query from the country/city in combined count keys.
+_SEP = "\x1f"
+
+
+def _clean(value: object) -> str:
+    return str(value or "").replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _partition_of(key: str, partitions: int) -> int:
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+def _shard_row(record: dict) -> str:
+    """One TSV shard line: query, ip, port, country, city."""
+    fields = ("query", "ip", "port", "country_code", "city")
+    return "\t".join(_clean(record.get(f)) for f in fields) + "\n"
+
+
+def _split_ranges(paths: Iterable[Path], chunk_bytes: int) -> list[tuple[Path, int, int]]:
+    """Split files into byte ranges; workers realign each range to line starts."""
+    ranges = []
+    for path in paths:
+        size = path.stat().st_size
+        for start in range(0, size, chunk_bytes):
+            ranges.append((path, start, min(start + chunk_bytes, size)))
+    return ranges
+
+
+def _map_range(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    task: int,
+    path: Path,
+    start: int,
+    end: int,
+    partitions: int,
+    by: str,
+    work_dir: Path,
+) -> None:
+    """Map stage: parse one byte range and write per-partition TSV shards."""
+    buckets: list[list[str]] = [[] for _ in range(partitions)]
+    with path.open("rb") as fh:
+        if start:
+            # A line that straddles ``start`` belongs to the previous range.
+            fh.seek(start - 1)
+            fh.readline()
+        while fh.tell() < end:
+            line = fh.readline()
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = _clean(record.get("ip" if by == "ip" else "country_code"))
+            buckets[_partition_of(key, partitions)].append(_shard_row(record))
+
+    for part, lines in enumerate(buckets):
+        if lines:
+            shard = work_dir / f"part-{part:05d}" / f"map-{task:06d}.tsv"
+            shard.write_text("".join(lines), encoding="utf-8")
+
+
+def _chunk_bytes(paths: list[Path], workers: int) -> int:
+    """Byte range size that gives every worker a share of the input."""
+    total = sum(path.stat().st_size for path in paths)
+    return min(_CHUNK_BYTES, max(_MIN_CHUNK_BYTES, math.ceil(total / workers)))
+
+
+def _reduce_partition(part_dir: Path) -> Counter[str]:
+    """Partition stage: dedup hosts and count per query, country and city."""
+    seen: set[tuple[str, str, str]] = set()
+    counts: Counter[str] = Counter()
+    for shard in sorted(part_dir.glob("*.tsv")):
+        with shard.open(encoding="utf-8") as fh:
+            for line in fh:
+                query, ip, port, country, city = line.rstrip("\n").split("\t")
+                host = (query, ip, port)
+                if host in seen:
+                    continue
+                seen.add(host)
+                counts[f"q{_SEP}{query}"] += 1
+                if country:
+                    counts[f"c{_SEP}{query}{_SEP}{country}"] += 1
+                if city:
+                    counts[f"y{_SEP}{query}{_SEP}{city}"] += 1
+    return counts
+
+
+def _merge(partials: Iterable[Counter[str]]) -> Counter[str]:
+    """Final stage: sum the per-partition counters."""
+    merged: Counter[str] = Counter()
+    for partial in partials:
+        merged.update(partial)
+    return merged
+
+
+def _to_scan_result(merged: Counter[str], top_n: int | None) -> ScanResult:
+    totals: dict[str, int] = {}
+    countries: dict[str, list[CountryCount]] = {}
+    cities: dict[str, list[CityCount]] = {}
+    for key, count in sorted(merged.items()):
+        kind, query, *rest = key.split(_SEP)
+        if kind == "q":
+            totals[query] = count
+        elif kind == "c":
+            code = rest[0]
+            countries.setdefault(query, []).append(
+                CountryCount(country_code=code, country_name=country_name(code), count=count)
+            )
+        else:
+            cities.setdefault(query, []).append(CityCount(city=rest[0], count=count))
+
+    query_results = []
+    for query in sorted(totals):
+        qr = QueryResult(
+            query=query,
+            total=totals[query],
+            countries=sorted(countries.get(query, []), key=lambda c: c.count, reverse=True),
+            cities=sorted(cities.get(query, []), key=lambda c: c.count, reverse=True),
+        )
+        query_results.append(qr)
+
+    scan = merge_query_results(query_results)
+    for qr in scan.query_results:
+        qr.countries = qr.countries[:top_n]
+        qr.cities = qr.cities[:top_n]
+    return scan
+
+
+def aggregate_host_files(  # pylint: disable=too-many-locals
+    paths: Iterable[str | Path],
+    by: str = "ip",
+    partitions: int | None = None,
+    workers: int | None = None,
+    top_n: int | None = None,
+) -> ScanResult:
+    """Aggregate host JSONL dumps into a ScanResult using a process pool.
+
+    ``by`` selects the partition key: ``"ip"`` gives exact cross-file
+    deduplication; ``"country"`` keeps each country's hosts together,
+    which is exact as long as a host's country does not change between
+    dumps. Per-query lists are truncated to ``top_n`` (all when None);
+    merged country and city lists are always complete.
+    """
+    if by not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partition key {by!r}; expected one of {PARTITION_KEYS}")
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers
+    paths = [Path(p) for p in paths]
+    ranges = _split_ranges(paths, _chunk_bytes(paths, workers))
+
+    with tempfile.TemporaryDirectory(prefix="openclaw-agg-") as tmp:
+        work_dir = Path(tmp)
+        part_dirs = [work_dir / f"part-{part:05d}" for part in range(partitions)]
+        for part_dir in part_dirs:
+            part_dir.mkdir()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            map_tasks = [
+                pool.submit(_map_range, task, path, start, end, partitions, by, work_dir)
+                for task, (path, start, end) in enumerate(ranges)
+            ]
+            for fut in map_tasks:
+                fut.result()
+            merged = _merge(pool.map(_reduce_partition, part_dirs))
+
+    return _to_scan_result(merged, top_n)
@@ -0,0 +1,295 @@
+"""Delta-encoded, zstd-compressed archive of scan snapshots.
+
+Consecutive snapshots differ in a handful of counts, so each snapshot is
+flattened into a map of counts (totals, countries, cities, per-query
+counts, versions, facets and their error bounds) and only the entries that changed since the
+previous snapshot are stored. Every ``keyframe_interval`` snapshots a full
+keyframe is written instead, which bounds the work needed to rebuild any
+one snapshot.
+
+File layout::
+
+    MAGIC
+    frame*     header (kind: u8, timestamp µs: i64, length: u32) + zstd payload
+
+Frame headers have a fixed size, so opening an archive reads only the
+headers to build an in-memory timestamp index; loading a snapshot then
+decodes at most ``keyframe_interval`` frames. Appending never rewrites
+existing frames, and a frame truncated by a crash is dropped on the next
+append.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import struct
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import zstandard
+
+from .models import ScanResult
+from .shodan_query import country_name
+
+MAGIC = b"OCSNAP1\n"
+
+KEYFRAME = 0
+DELTA = 1
+
+_HEADER = struct.Struct("<BqI")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Separates the parts of a flattened count key.
+_SEP = "\x1f"
+
+
+def _to_micros(timestamp: datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def flatten(result: ScanResult) -> tuple[dict[str, Any], dict[str, int]]:
+    """Split a scan result into its layout (query and facet names) and counts."""
+    layout = {
+        "queries_run": result.queries_run,
+        "per_query": [qr.query for qr in result.query_results],
+        "upper_bound": [qr.query for qr in result.query_results if qr.upper_bound],
+        "facets": list(result.facets),
+    }
+    counts = {"t": result.total_instances}
+    counts.update((f"c{_SEP}{c.country_code}", c.count) for c in result.countries)
+    counts.update((f"y{_SEP}{c.city}", c.count) for c in result.cities)
+    for qr in result.query_results:
+        counts[f"q{_SEP}{qr.query}"] = qr.total
+        counts.update((f"qc{_SEP}{qr.query}{_SEP}{c.country_code}", c.count) for c in qr.countries)
+        counts.update((f"qy{_SEP}{qr.query}{_SEP}{c.city}", c.count) for c in qr.cities)
+    counts.update((f"v{_SEP}{v.product}{_SEP}{v.version}", v.count) for v in result.versions)
+    for name, values in result.facets.items():
+        counts.update((f"f{_SEP}{name}{_SEP}{f.value}", f.count) for f in values)
+        counts.update((f"fe{_SEP}{name}{_SEP}{f.value}", f.error) for f in values if f.error)
+    return layout, counts
+
+
+def unflatten(timestamp: datetime, layout: dict[str, Any], counts: dict[str, int]) -> ScanResult:
+    """Rebuild a scan result from ``flatten`` output.
+
+    Lists are returned in descending count order; ties keep the order in
+    which their keys first appeared in the archive.
+    """
+    countries: list[dict[str, Any]] = []
+    cities: list[dict[str, Any]] = []
+    upper_bound = set(layout.get("upper_bound", []))
+    per_query = {q: {"query": q, "total": 0, "countries": [], "cities": [],
+                     "upper_bound": q in upper_bound}
+                 for q in layout["per_query"]}
+    versions: list[dict[str, Any]] = []
+    facets: dict[str, list[dict[str, Any]]] = {name: [] for name in layout["facets"]}
+    facet_errors: dict[tuple[str, str], int] = {}
+
+    for key, count in counts.items():
+        kind, *parts = key.split(_SEP)
+        if kind == "c":
+            code = parts[0]
+            countries.append(
+                {"country_code": code, "country_name": country_name(code), "count": count}
+            )
+        elif kind == "y":
+            cities.append({"city": parts[0], "count": count})
+        elif kind == "q":
+            per_query[parts[0]]["total"] = count
+        elif kind == "qc":
+            per_query[parts[0]]["countries"].append(
+                {"country_code": parts[1], "country_name": country_name(parts[1]), "count": count}
+            )
+        elif kind == "qy":
+            per_query[parts[0]]["cities"].append({"city": parts[1], "count": count})
+        elif kind == "v":
+            versions.append({"product": parts[0], "version": parts[1], "count": count})
+        elif kind == "f":
+            facets[parts[0]].append({"value": parts[1], "count": count})
+        elif kind == "fe":
+            facet_errors[(parts[0], parts[1])] = count
+
+    def by_count(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return sorted(items, key=lambda item: item["count"], reverse=True)
+
+    for name, values in facets.items():
+        for value in values:
+            value["error"] = facet_errors.get((name, value["value"]), 0)
+    for qr in per_query.values():
+        qr["countries"] = by_count(qr["countries"])
+        qr["cities"] = by_count(qr["cities"])
+    return ScanResult.from_dict(
+        {
+            "timestamp": timestamp.isoformat(),
+            "total_instances": counts.get("t", 0),
+            "queries_run": layout["queries_run"],
+            "countries": by_count(countries),
+            "cities": by_count(cities),
+            "per_query": list(per_query.values()),
+            "versions": by_count(versions),
+            "facets": {name: by_count(values) for name, values in facets.items()},
+        }
+    )
+
+
+def _delta(
+    previous: tuple[dict[str, Any], dict[str, int]],
+    current: tuple[dict[str, Any], dict[str, int]],
+) -> dict[str, Any]:
+    (old_layout, old_counts), (layout, counts) = previous, current
+    payload: dict[str, Any] = {
+        "set": {k: v for k, v in counts.items() if old_counts.get(k) != v},
+        "del": [k for k in old_counts if k not in counts],
+    }
+    if layout != old_layout:
+        payload["layout"] = layout
+    return payload
+
+
+def _apply(
+    state: tuple[dict[str, Any], dict[str, int]], payload: dict[str, Any]
+) -> tuple[dict[str, Any], dict[str, int]]:
+    layout, counts = state
+    counts = dict(counts)
+    for key in payload["del"]:
+        del counts[key]
+    counts.update(payload["set"])
+    return payload.get("layout", layout), counts
+
+
+class SnapshotArchive:  # pylint: disable=too-many-instance-attributes
+    """Append-only archive of scan results with random access by timestamp."""
+
+    def __init__(self, path: str | Path, keyframe_interval: int = 24, level: int = 19) -> None:
+        self.path = Path(path)
+        self.keyframe_interval = keyframe_interval
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        # Parallel index lists: timestamp (µs), frame offset, payload length, keyframe position.
+        self._times: list[int] = []
+        self._offsets: list[int] = []
+        self._lengths: list[int] = []
+        self._keyframes: list[int] = []
+        self._end = len(MAGIC)
+        self._last: tuple[dict[str, Any], dict[str, int]] | None = None
+        if self.path.exists():
+            self._read_index()
+
+    def _read_index(self) -> None:
+        size = self.path.stat().st_size
+        with self.path.open("rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot archive")
+            offset = len(MAGIC)
+            while offset + _HEADER.size <= size:
+                kind, micros, length = _HEADER.unpack(fh.read(_HEADER.size))
+                if offset + _HEADER.size + length > size:
+                    break  # Truncated by an interrupted append.
+                self._times.append(micros)
+                self._offsets.append(offset)
+                self._lengths.append(length)
+                if kind == KEYFRAME:
+                    self._keyframes.append(len(self._times) - 1)
+                elif kind == DELTA and self._keyframes:
+                    self._keyframes.append(self._keyframes[-1])
+                else:
+                    raise ValueError(f"{self.path} is corrupt: bad frame at byte {offset}")
+                offset += _HEADER.size + length
+                fh.seek(offset)
+        self._end = offset
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def timestamps(self) -> list[datetime]:
+        """Timestamps of every archived snapshot, oldest first."""
+        return [_from_micros(t) for t in self._times]
+
+    def _payload(self, fh: Any, position: int) -> dict[str, Any]:
+        fh.seek(self._offsets[position] + _HEADER.size)
+        raw = self._decompressor.decompress(fh.read(self._lengths[position]))
+        return json.loads(raw)
+
+    def _state(self, position: int) -> tuple[dict[str, Any], dict[str, int]]:
+        """Rebuild one snapshot from its keyframe and following deltas."""
+        with self.path.open("rb") as fh:
+            keyframe = self._keyframes[position]
+            payload = self._payload(fh, keyframe)
+            state = (payload["layout"], payload["counts"])
+            for i in range(keyframe + 1, position + 1):
+                state = _apply(state, self._payload(fh, i))
+        return state
+
+    def load(self, timestamp: datetime | None = None) -> ScanResult:
+        """The latest snapshot at or before ``timestamp`` (default: the newest).
+
+        Raises KeyError if the archive has no such snapshot.
+        """
+        if timestamp is None:
+            position = len(self._times) - 1
+        else:
+            position = bisect.bisect_right(self._times, _to_micros(timestamp)) - 1
+        if position < 0:
+            raise KeyError(f"no snapshot at or before {timestamp}")
+        layout, counts = self._state(position)
+        return unflatten(_from_micros(self._times[position]), layout, counts)
+
+    def __iter__(self) -> Iterator[ScanResult]:
+        """Every snapshot, oldest first, decoding each frame once."""
+        state: tuple[dict[str, Any], dict[str, int]] | None = None
+        with self.path.open("rb") as fh:
+            for position, micros in enumerate(self._times):
+                payload = self._payload(fh, position)
+                if self._keyframes[position] == position:
+                    state = (payload["layout"], payload["counts"])
+                else:
+                    state = _apply(state, payload)
+                yield unflatten(_from_micros(micros), *state)
+
+    def append(self, result: ScanResult) -> int:
+        """Add a snapshot newer than every archived one; returns bytes written."""
+        micros = _to_micros(result.timestamp)
+        if self._times and micros <= self._times[-1]:
+            raise ValueError(
+                f"snapshot {result.timestamp.isoformat()} is not newer than "
+                f"{_from_micros(self._times[-1]).isoformat()}"
+            )
+        current = flatten(result)
+        position = len(self._times)
+        if position and position - self._keyframes[-1] < self.keyframe_interval:
+            if self._last is None:
+                self._last = self._state(position - 1)
+            kind, payload = DELTA, _delta(self._last, current)
+        else:
+            kind, payload = KEYFRAME, {"layout": current[0], "counts": current[1]}
+
+        data = self._compressor.compress(json.dumps(payload, separators=(",", ":")).encode())
+        mode = "r+b" if self.path.exists() else "w+b"
+        with self.path.open(mode) as fh:
+            if mode == "w+b":
+                fh.write(MAGIC)
+            fh.seek(self._end)
+            fh.truncate()
+            fh.write(_HEADER.pack(kind, micros, len(data)))
+            fh.write(data)
+
+        self._times.append(micros)
+        self._offsets.append(self._end)
+        self._lengths.append(len(data))
+        self._keyframes.append(position if kind == KEYFRAME else self._keyframes[-1])
+        self._end += _HEADER.size + len(data)
+        self._last = current
+        return _HEADER.size + len(data)
+
+    def extend(self, results: Iterable[ScanResult]) -> int:
+        """Append several snapshots in timestamp order; returns bytes written."""
+        return sum(self.append(r) for r in sorted(results, key=lambda r: r.timestamp))
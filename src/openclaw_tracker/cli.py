@@ -2,22 +2,42 @@
 
 from __future__ import annotations
 
+import contextlib
 import os
 import subprocess
 import sys
 import threading
 import time
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import click
 import shodan
 from rich.console import Console
 
-from .reporter import print_scan_result, write_json
-from .shodan_query import run_all_queries
+from .aggregate import PARTITION_KEYS, aggregate_host_files
+from .anomaly import Alert, AnomalyDetector, append_alerts_jsonl, post_alerts
+from .archive import SnapshotArchive
+from .enrich import enrich_from_hosts
+from .models import ScanResult
+from .reporter import (
+    ROW_FORMATS,
+    RowWriter,
+    dump_hosts_jsonl,
+    print_alerts,
+    print_scan_result,
+    read_json,
+    write_output,
+)
+from .sources import Source, iter_source_hosts, run_sources, source_from_spec
+from .workqueue import WorkQueue, collect, plan_scan, run_worker
 
 console = Console()
+err_console = Console(stderr=True)
 
 
 @click.group()
@@ -26,6 +46,15 @@ def main() -> None:
     """OpenClaw Tracker — geographic distribution of public OpenClaw instances."""
 
 
+def _check_webhook(_ctx: click.Context, _param: click.Parameter, url: str | None) -> str | None:
+    """Reject webhook URLs that cannot be POSTed to before any work is done."""
+    if url is not None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise click.BadParameter(f"{url!r} is not an http(s) URL")
+    return url
+
+
 @main.command()
 @click.option(
     "--shodan-key",
@@ -44,7 +73,55 @@ def main() -> None:
     "-o",
     default=None,
     type=click.Path(),
-    help="Write results to a JSON file.",
+    help="Write results to a file (.parquet for Parquet, otherwise JSON).",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(("auto", "table", *ROW_FORMATS)),
+    default="auto",
+    show_default=True,
+    help="Output format. 'auto' prints tables on a terminal and NDJSON when piped.",
+)
+@click.option(
+    "--dataset",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Add the snapshot (and any streamed hosts) to a partitioned Parquet dataset.",
+)
+@click.option(
+    "--archive",
+    "archive_path",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Append the snapshot to a delta-compressed archive file.",
+)
+@click.option(
+    "--detect",
+    "detect_state",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Update anomaly baselines in this state file and report spikes.",
+)
+@click.option(
+    "--alerts-file",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Append anomaly alerts to a JSONL file.",
+)
+@click.option(
+    "--webhook",
+    envvar="OPENCLAW_ALERT_WEBHOOK",
+    default=None,
+    callback=_check_webhook,
+    help="POST anomaly alerts to this URL (or set OPENCLAW_ALERT_WEBHOOK).",
+)
+@click.option(
+    "--source",
+    "source_specs",
+    multiple=True,
+    help="Data source (repeatable): 'shodan' (default) or 'file:<path or glob>' for "
+    "HostRecord JSONL, masscan or zgrab2 dumps.",
 )
 @click.option(
     "--query",
@@ -52,13 +129,371 @@ def main() -> None:
     multiple=True,
     help="Custom Shodan query (repeatable). Overrides defaults if provided.",
 )
-def scan(
+@click.option(
+    "--fingerprint",
+    is_flag=True,
+    default=False,
+    help="Stream host banners and break results down by product version.",
+)
+@click.option(
+    "--facets",
+    is_flag=True,
+    default=False,
+    help="Stream host records and add top org, ASN and port facets.",
+)
+@click.option(
+    "--hosts-output",
+    default=None,
+    type=click.Path(),
+    help="Append streamed host records to a JSONL file (for `aggregate`).",
+)
+@click.option(
+    "--host-limit",
+    default=1000,
+    show_default=True,
+    help="Maximum hosts to stream per query (uses Shodan query credits).",
+)
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="Worker processes for fingerprinting (default: CPU count).",
+)
+def scan(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
     shodan_key: str | None,
     top: int,
     output: str | None,
+    fmt: str,
+    dataset: str | None,
+    archive_path: str | None,
+    detect_state: str | None,
+    alerts_file: str | None,
+    webhook: str | None,
+    source_specs: tuple[str, ...],
     query: tuple[str, ...],
+    fingerprint: bool,
+    facets: bool,
+    hosts_output: str | None,
+    host_limit: int,
+    workers: int | None,
 ) -> None:
     """Query Shodan for geographic distribution of OpenClaw instances."""
+    if fmt == "auto":
+        fmt = "table" if sys.stdout.isatty() else "ndjson"
+    # Machine-readable output owns stdout; status messages go to stderr.
+    rows = RowWriter(fmt, sys.stdout) if fmt != "table" else None
+    status = console if rows is None else err_console
+
+    sources = _build_sources(source_specs or ("shodan",), shodan_key, status)
+    if dataset:
+        # pyarrow is slow to import, so only --dataset loads it.
+        # pylint: disable-next=import-outside-toplevel
+        from .columnar import HostDatasetWriter, write_snapshot_dataset
+    queries = list(query) if query else None
+
+    status.print(f"[dim]Querying {', '.join(s.name for s in sources)}...[/dim]")
+    try:
+        result = run_sources(
+            sources,
+            queries=queries,
+            top_n=top,
+            on_result=rows.write_query if rows else None,
+        )
+        if fingerprint or facets or hosts_output:
+            status.print("[dim]Streaming host records...[/dim]")
+            scanned = result.timestamp.isoformat()
+            hosts = (
+                replace(host, scan_timestamp=scanned)
+                for host in iter_source_hosts(sources, queries, limit=host_limit)
+            )
+            if hosts_output:
+                hosts = dump_hosts_jsonl(hosts, hosts_output)
+            with contextlib.ExitStack() as stack:
+                if dataset:
+                    writer = stack.enter_context(HostDatasetWriter(dataset, result.timestamp))
+                    hosts = writer.consume(hosts)
+                enrich_from_hosts(
+                    result,
+                    hosts,
+                    fingerprint=fingerprint,
+                    facets=facets,
+                    top_n=top,
+                    workers=workers,
+                )
+    except (shodan.APIError, OSError, ValueError) as exc:
+        status.print(f"[red]Query failed:[/red] {exc}")
+        sys.exit(1)
+
+    if rows is None:
+        print_scan_result(result)
+    else:
+        rows.write_merged(result)
+
+    if output:
+        write_output(result, output)
+
+    if dataset:
+        write_snapshot_dataset(result, dataset)
+        status.print(f"[green]Snapshot added to dataset {dataset}[/green]")
+
+    if archive_path:
+        _append_archive(archive_path, result, status)
+
+    if detect_state:
+        _detect_anomalies(result, detect_state, alerts_file, webhook, status)
+
+
+def _build_sources(specs: tuple[str, ...], shodan_key: str | None, status: Console) -> list[Source]:
+    """Build the scan's data sources, exiting with an error on a bad spec."""
+    if "shodan" in specs and not shodan_key:
+        status.print(
+            "[red]Error:[/red] No Shodan API key provided.\n"
+            "Set SHODAN_API_KEY or pass --shodan-key."
+        )
+        sys.exit(1)
+    try:
+        return [source_from_spec(spec, shodan_key) for spec in specs]
+    except ValueError as exc:
+        status.print(f"[red]Error:[/red] {exc}")
+        sys.exit(1)
+
+
+def _append_archive(path: str, result: ScanResult, status: Console) -> None:
+    """Append the scan to an archive, failing cleanly on a bad archive."""
+    try:
+        SnapshotArchive(path).append(result)
+    except ValueError as exc:
+        raise click.ClickException(f"Archive append failed: {exc}") from exc
+    status.print(f"[green]Snapshot appended to archive {path}[/green]")
+
+
+def _detect_anomalies(
+    result: ScanResult,
+    state: str,
+    alerts_file: str | None,
+    webhook: str | None,
+    status: Console,
+) -> None:
+    """Update the detector state with the scan and deliver any alerts."""
+    try:
+        detector = AnomalyDetector.load(state)
+    except (OSError, ValueError, KeyError) as exc:
+        raise click.ClickException(f"Detection failed: {exc}") from exc
+    alerts = detector.update(result)
+    detector.save(state)
+    print_alerts(alerts, out=status)
+    _send_alerts(alerts, alerts_file, webhook, status)
+
+
+def _send_alerts(
+    alerts: list[Alert], alerts_file: str | None, webhook: str | None, status: Console
+) -> None:
+    """Deliver alerts to the optional file and webhook sinks."""
+    if not alerts:
+        return
+    if alerts_file:
+        append_alerts_jsonl(alerts, alerts_file)
+    if webhook:
+        try:
+            post_alerts(alerts, webhook)
+        except (OSError, ValueError) as exc:
+            status.print(f"[yellow]Webhook delivery failed:[/yellow] {exc}")
+
+
+@main.command()
+@click.argument("state", type=click.Path(dir_okay=False))
+@click.argument("results", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--alpha", default=0.3, show_default=True, help="EWMA smoothing factor.")
+@click.option("--threshold", default=3.0, show_default=True, help="Alert z-score threshold.")
+@click.option(
+    "--warmup",
+    default=5,
+    show_default=True,
+    help="Observations per series before it can alert.",
+)
+@click.option(
+    "--alerts-file",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Append alerts to a JSONL file.",
+)
+@click.option(
+    "--webhook",
+    envvar="OPENCLAW_ALERT_WEBHOOK",
+    default=None,
+    callback=_check_webhook,
+    help="POST alerts to this URL (or set OPENCLAW_ALERT_WEBHOOK).",
+)
+def detect(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    state: str,
+    results: tuple[str, ...],
+    alpha: float,
+    threshold: float,
+    warmup: int,
+    alerts_file: str | None,
+    webhook: str | None,
+) -> None:
+    """Feed scan result files through the anomaly detector whose state is in STATE."""
+    try:
+        detector = AnomalyDetector.load(state, alpha=alpha, threshold=threshold, warmup=warmup)
+        scans = sorted((read_json(r) for r in results), key=lambda r: r.timestamp)
+    except (OSError, ValueError, KeyError) as exc:
+        console.print(f"[red]Detection failed:[/red] {exc}")
+        sys.exit(1)
+
+    alerts = [alert for scan in scans for alert in detector.update(scan)]
+    detector.save(state)
+    print_alerts(alerts)
+    _send_alerts(alerts, alerts_file, webhook, console)
+
+
+@main.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--by",
+    type=click.Choice(PARTITION_KEYS),
+    default="ip",
+    show_default=True,
+    help="Partition hosts by hash of IP (exact dedup) or by country.",
+)
+@click.option("--partitions", default=None, type=int, help="Partition count (default: workers).")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: CPU count).")
+@click.option("--top", default=20, show_default=True, help="Top countries/cities per query.")
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    type=click.Path(),
+    help="Write results to a file (.parquet for Parquet, otherwise JSON).",
+)
+def aggregate(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    paths: tuple[str, ...],
+    by: str,
+    partitions: int | None,
+    workers: int | None,
+    top: int,
+    output: str | None,
+) -> None:
+    """Aggregate host JSONL dumps (from `scan --hosts-output`) in parallel."""
+    console.print(f"[dim]Aggregating {len(paths)} host file(s)...[/dim]")
+    try:
+        result = aggregate_host_files(
+            paths, by=by, partitions=partitions, workers=workers, top_n=top
+        )
+    except (OSError, ValueError) as exc:
+        console.print(f"[red]Aggregation failed:[/red] {exc}")
+        sys.exit(1)
+
+    print_scan_result(result)
+
+    if output:
+        write_output(result, output)
+
+
+@main.command()
+@click.argument("result_path", metavar="RESULT", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--html",
+    "html_dir",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Directory to write the static report to.",
+)
+@click.option("--top", default=20, show_default=True, help="Top N countries/cities to chart.")
+def report(result_path: str, html_dir: str, top: int) -> None:
+    """Render a scan result JSON file into a self-contained static HTML report."""
+    try:
+        result = read_json(result_path)
+    except (OSError, ValueError, KeyError) as exc:
+        console.print(f"[red]Could not read result:[/red] {exc}")
+        sys.exit(1)
+
+    # Plotly is slow to import, so only the report command loads it.
+    # pylint: disable-next=import-outside-toplevel
+    from .report import write_html_report
+
+    index = write_html_report(result, html_dir, limit=top)
+    console.print(f"[green]Report written to {index}[/green]")
+
+
+@main.command()
+@click.option(
+    "--data",
+    "data_dir",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory of scan result JSON files (from `scan -o`).",
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to bind.")
+@click.option("--port", default=8080, show_default=True, help="Port to listen on.")
+@click.option(
+    "--refresh",
+    default=30.0,
+    show_default=True,
+    help="Seconds between checks for new or changed result files.",
+)
+def serve(data_dir: str, host: str, port: int, refresh: float) -> None:
+    """Serve scan results as a JSON HTTP API with ETag and gzip caching."""
+    # asyncio is slow to import, so only the serve command loads it.
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    from .server import APIServer, ResultStore  # pylint: disable=import-outside-toplevel
+
+    store = ResultStore(data_dir)
+    console.print(f"[dim]Serving {data_dir} on http://{host}:{port}/api/latest[/dim]")
+    try:
+        asyncio.run(APIServer(store, refresh_interval=refresh).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+@main.group()
+def queue() -> None:
+    """Distributed scanning over a shared SQLite work queue."""
+
+
+@queue.command("submit")
+@click.argument("db", type=click.Path(dir_okay=False))
+@click.option(
+    "--query",
+    "-q",
+    multiple=True,
+    help="Custom Shodan query (repeatable). Overrides defaults if provided.",
+)
+@click.option("--top", default=20, show_default=True, help="Top facet values per query.")
+@click.option(
+    "--host-limit",
+    default=0,
+    show_default=True,
+    help="Hosts to page through and fingerprint per query (uses Shodan query credits).",
+)
+@click.option("--facets", is_flag=True, default=False, help="Add org, ASN and port facets.")
+def queue_submit(db: str, query: tuple[str, ...], top: int, host_limit: int, facets: bool) -> None:
+    """Plan a scan into the queue at DB (safe to re-run)."""
+    with WorkQueue(db) as wq:
+        added = plan_scan(
+            wq, list(query) or None, top_n=top, host_limit=host_limit, facets=facets
+        )
+    console.print(f"[green]Queued {added} task(s) in {db}[/green]")
+
+
+@queue.command("work")
+@click.argument("db", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--shodan-key",
+    envvar="SHODAN_API_KEY",
+    default=None,
+    help="Shodan API key (or set SHODAN_API_KEY env var).",
+)
+@click.option("--processes", default=1, show_default=True, help="Worker processes to start.")
+@click.option(
+    "--lease",
+    default=60.0,
+    show_default=True,
+    help="Seconds a task stays leased without a heartbeat before it is retried.",
+)
+def queue_work(db: str, shodan_key: str | None, processes: int, lease: float) -> None:
+    """Process tasks from DB until the queue is drained."""
     if not shodan_key:
         console.print(
             "[red]Error:[/red] No Shodan API key provided.\n"
@@ -66,23 +501,128 @@ def scan(
         )
         sys.exit(1)
 
-    queries = list(query) if query else None
+    if processes <= 1:
+        completed = run_worker(db, shodan_key, lease_seconds=lease)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(run_worker, db, shodan_key, lease_seconds=lease)
+                for _ in range(processes)
+            ]
+            completed = sum(f.result() for f in futures)
+    console.print(f"[green]Completed {completed} task(s)[/green]")
+
+
+@queue.command("status")
+@click.argument("db", type=click.Path(exists=True, dir_okay=False))
+def queue_status(db: str) -> None:
+    """Show task counts by status."""
+    with WorkQueue(db) as wq:
+        counts = wq.status_counts()
+    for state in ("pending", "leased", "done", "failed"):
+        console.print(f"{state:>8}: {counts.get(state, 0)}")
+
+
+@queue.command("collect")
+@click.argument("db", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    type=click.Path(),
+    help="Write results to a file (.parquet for Parquet, otherwise JSON).",
+)
+@click.option(
+    "--partial",
+    is_flag=True,
+    default=False,
+    help="Aggregate even if tasks are still pending, leased or failed.",
+)
+def queue_collect(db: str, output: str | None, partial: bool) -> None:
+    """Aggregate completed tasks in DB into one scan result."""
+    with WorkQueue(db) as wq:
+        counts = wq.status_counts()
+        unfinished = sum(n for state, n in counts.items() if state != "done")
+        if unfinished and not partial:
+            console.print(
+                f"[red]Error:[/red] {unfinished} task(s) not done; "
+                "run `queue work` or pass --partial."
+            )
+            sys.exit(1)
+        result = collect(wq)
+
+    print_scan_result(result)
+
+    if output:
+        write_output(result, output)
+
 
-    console.print("[dim]Querying Shodan...[/dim]")
+@main.group()
+def archive() -> None:
+    """Delta-compressed snapshot archives."""
+
+
+@archive.command("append")
+@click.argument("path", type=click.Path(dir_okay=False))
+@click.argument("results", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--keyframe-interval",
+    default=24,
+    show_default=True,
+    help="Store a full snapshot every N snapshots; loading decodes at most N frames.",
+)
+def archive_append(path: str, results: tuple[str, ...], keyframe_interval: int) -> None:
+    """Append scan result JSON files to the archive at PATH."""
     try:
-        result = run_all_queries(
-            api_key=shodan_key,
-            queries=queries,
-            top_countries=top,
-        )
-    except (shodan.APIError, OSError) as exc:
-        console.print(f"[red]Shodan query failed:[/red] {exc}")
+        store = SnapshotArchive(path, keyframe_interval=keyframe_interval)
+        written = store.extend(read_json(r) for r in results)
+    except (OSError, ValueError, KeyError) as exc:
+        console.print(f"[red]Archive append failed:[/red] {exc}")
+        sys.exit(1)
+    console.print(
+        f"[green]Appended {len(results)} snapshot(s) to {path} ({written:,} bytes)[/green]"
+    )
+
+
+@archive.command("list")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def archive_list(path: str) -> None:
+    """List the snapshot timestamps in an archive."""
+    try:
+        timestamps = SnapshotArchive(path).timestamps()
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    for timestamp in timestamps:
+        console.print(timestamp.isoformat())
+
+
+@archive.command("extract")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--at",
+    "at",
+    default=None,
+    help="ISO-8601 timestamp; extracts the latest snapshot at or before it (default: newest).",
+)
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    type=click.Path(),
+    help="Write results to a file (.parquet for Parquet, otherwise JSON).",
+)
+def archive_extract(path: str, at: str | None, output: str | None) -> None:
+    """Rebuild one snapshot from an archive."""
+    try:
+        result = SnapshotArchive(path).load(datetime.fromisoformat(at) if at else None)
+    except (KeyError, ValueError) as exc:
+        console.print(f"[red]Extract failed:[/red] {exc}")
         sys.exit(1)
 
     print_scan_result(result)
 
     if output:
-        write_json(result, output)
+        write_output(result, output)
 
 
 @main.command()
@@ -0,0 +1,193 @@
+"""Columnar Parquet export and a partitioned, DuckDB-queryable dataset layout.
+
+A scan result is flattened into long-format snapshot rows, one per
+``(query, dimension, key)``::
+
+    timestamp | query | dimension | key | name | count
+
+``dimension`` is one of ``total``, ``country``, ``city``, ``version`` or
+``facet:<name>``. Merged (all-query) rows use the query ``"*"``.
+
+Datasets are laid out with Hive-style partitions so SQL engines prune by
+date and query without opening unrelated files::
+
+    <root>/snapshots/date=2026-10-19/query=<quoted query>/<stamp>.parquet
+    <root>/hosts/date=2026-10-19/query=<quoted query>/<stamp>.parquet
+
+Partition values are URL-quoted and are not repeated inside the files.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from types import TracebackType
+from urllib.parse import quote, unquote
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .models import HostRecord, ScanResult
+from .rows import snapshot_rows
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("query", pa.string()),
+        ("dimension", pa.string()),
+        ("key", pa.string()),
+        ("name", pa.string()),
+        ("count", pa.int64()),
+    ]
+)
+
+HOST_SCHEMA = pa.schema(
+    [
+        ("scan_timestamp", pa.timestamp("us", tz="UTC")),
+        ("ip", pa.string()),
+        ("port", pa.int32()),
+        ("country_code", pa.string()),
+        ("city", pa.string()),
+        ("org", pa.string()),
+        ("asn", pa.string()),
+        ("timestamp", pa.string()),
+        ("title", pa.string()),
+        ("banner", pa.string()),
+        ("html", pa.string()),
+        ("product", pa.string()),
+        ("version", pa.string()),
+    ]
+)
+
+
+def _table(timestamp: datetime, rows: list[tuple], schema: pa.Schema) -> pa.Table:
+    data: dict[str, list] = {"timestamp": [timestamp] * len(rows)}
+    for i, name in enumerate(schema.names[1:]):
+        data[name] = [row[i] for row in rows]
+    return pa.table(data, schema=schema)
+
+
+def snapshot_table(result: ScanResult) -> pa.Table:
+    """Build the long-format snapshot table for a scan result."""
+    return _table(result.timestamp, list(snapshot_rows(result)), SNAPSHOT_SCHEMA)
+
+
+def write_parquet(result: ScanResult, path: str | Path) -> None:
+    """Write a scan result to a single Parquet file of snapshot rows."""
+    pq.write_table(snapshot_table(result), Path(path), compression="zstd")
+
+
+def _partition_dir(root: Path, kind: str, timestamp: datetime, query: str) -> Path:
+    return root / kind / f"date={timestamp:%Y-%m-%d}" / f"query={quote(query, safe='')}"
+
+
+def _stamp(timestamp: datetime) -> str:
+    return f"{timestamp:%Y%m%dT%H%M%S%fZ}"
+
+
+def write_snapshot_dataset(result: ScanResult, root: str | Path) -> list[Path]:
+    """Add a scan result to ``<root>/snapshots``, one file per query partition."""
+    root = Path(root)
+    by_query: dict[str, list[tuple]] = {}
+    for query, *row in snapshot_rows(result):
+        by_query.setdefault(query, []).append(tuple(row))
+
+    # The query is a partition key, so it is not stored in the files.
+    schema = SNAPSHOT_SCHEMA.remove(SNAPSHOT_SCHEMA.get_field_index("query"))
+    written = []
+    for query, rows in by_query.items():
+        part = _table(result.timestamp, rows, schema)
+        directory = _partition_dir(root, "snapshots", result.timestamp, query)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{_stamp(result.timestamp)}.parquet"
+        pq.write_table(part, path, compression="zstd")
+        written.append(path)
+    return written
+
+
+class HostDatasetWriter:
+    """Stream host records into ``<root>/hosts`` in Arrow record batches.
+
+    One Parquet file is kept open per query partition and each batch of
+    ``batch_size`` hosts becomes a row group, so memory is bounded by the
+    batch size rather than the number of hosts.
+    """
+
+    def __init__(self, root: str | Path, timestamp: datetime, batch_size: int = 10_000) -> None:
+        self.root = Path(root)
+        self.timestamp = timestamp
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._buffers: dict[str, list[HostRecord]] = {}
+        self._writers: dict[str, pq.ParquetWriter] = {}
+
+    def write(self, host: HostRecord) -> None:
+        """Buffer one host, flushing its partition when the batch is full."""
+        buffer = self._buffers.setdefault(host.query, [])
+        buffer.append(host)
+        if len(buffer) >= self.batch_size:
+            self._flush(host.query)
+
+    def consume(self, hosts: Iterable[HostRecord]) -> Iterator[HostRecord]:
+        """Write hosts while passing them through to a downstream consumer."""
+        for host in hosts:
+            self.write(host)
+            yield host
+
+    def _flush(self, query: str) -> None:
+        hosts = self._buffers.pop(query, [])
+        if not hosts:
+            return
+        columns: dict[str, list] = {name: [] for name in HOST_SCHEMA.names}
+        for host in hosts:
+            row = host.to_dict()
+            row["scan_timestamp"] = self.timestamp
+            for name, values in columns.items():
+                values.append(row[name])
+        batch = pa.RecordBatch.from_pydict(columns, schema=HOST_SCHEMA)
+
+        writer = self._writers.get(query)
+        if writer is None:
+            directory = _partition_dir(self.root, "hosts", self.timestamp, query)
+            directory.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(
+                directory / f"{_stamp(self.timestamp)}.parquet",
+                HOST_SCHEMA,
+                compression="zstd",
+            )
+            self._writers[query] = writer
+        writer.write_batch(batch)
+        self.rows_written += len(hosts)
+
+    def close(self) -> None:
+        """Flush remaining buffers and close every partition file."""
+        for query in list(self._buffers):
+            self._flush(query)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def __enter__(self) -> HostDatasetWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def read_host_dataset(root: str | Path) -> Iterator[HostRecord]:
+    """Read every host record under ``<root>/hosts``, one row group at a time."""
+    for path in sorted((Path(root) / "hosts").glob("date=*/query=*/*.parquet")):
+        query = unquote(path.parent.name.removeprefix("query="))
+        parquet = pq.ParquetFile(path)
+        for group in range(parquet.num_row_groups):
+            for row in parquet.read_row_group(group, columns=HOST_SCHEMA.names).to_pylist():
+                scanned = row.pop("scan_timestamp")
+                yield HostRecord(
+                    query=query, scan_timestamp=scanned.isoformat() if scanned else "", **row
+                )
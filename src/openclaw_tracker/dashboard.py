@@ -2,26 +2,264 @@
 
 from __future__ import annotations
 
+import glob
 import json
 import os
+from pathlib import Path
 
-import plotly.express as px
-import pycountry
 import shodan
 import streamlit as st
 
-from openclaw_tracker.models import ScanResult
-from openclaw_tracker.shodan_query import run_all_queries
+from openclaw_tracker.enrich import enrich_from_hosts
+from openclaw_tracker.figures import (
+    cities_figure,
+    countries_figure,
+    country_rows,
+    facet_figure,
+    facet_label,
+    map_figure,
+    query_countries_figure,
+    versions_figure,
+)
+from openclaw_tracker.index import HostIndex, load_hosts
+from openclaw_tracker.models import QueryResult, ScanResult
+from openclaw_tracker.shodan_query import DEFAULT_QUERIES, country_name, merge_query_results
+from openclaw_tracker.sources import (
+    ShodanSource,
+    Source,
+    iter_source_hosts,
+    run_sources,
+    source_from_spec,
+)
 
 st.set_page_config(page_title="OpenClaw Tracker", layout="wide")
 
 
-def _alpha3(code: str) -> str | None:
-    """Convert ISO alpha-2 country code to alpha-3 for Plotly choropleth."""
-    try:
-        return pycountry.countries.get(alpha_2=code).alpha_3
-    except (AttributeError, LookupError):
-        return None
+def _render_metrics(scan: ScanResult) -> None:
+    """Render the metric cards and data captions."""
+    num_countries = len(scan.countries)
+    num_cities = len(scan.cities)
+    top_country = scan.countries[0] if scan.countries else None
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Instances", f"{scan.total_instances:,}")
+    col2.metric("Countries", num_countries)
+    col3.metric("Cities", num_cities)
+    if top_country:
+        col4.metric(
+            "Top Country",
+            top_country.country_name,
+            f"{top_country.count:,} instances",
+        )
+
+    st.caption("Note: totals may include duplicates across queries.")
+    if any(qr.upper_bound for qr in scan.query_results):
+        st.caption(
+            "Counts summed across sources are upper bounds: "
+            "a host seen by several sources is counted once per source."
+        )
+    st.caption(f"Data fetched at: {scan.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+
+
+def _render_map(rows: list[dict], key: str) -> None:
+    """Render the choropleth globe."""
+    if rows:
+        st.subheader("World Map")
+        st.plotly_chart(map_figure(rows), use_container_width=True, key=f"{key}-map")
+
+
+def _render_top_charts(scan: ScanResult, rows: list[dict], limit: int, key: str) -> None:
+    """Render the top-N country, city, version and facet bar charts."""
+    if rows:
+        st.subheader(f"Top {limit} Countries")
+        st.plotly_chart(
+            countries_figure(rows[:limit]), use_container_width=True, key=f"{key}-countries"
+        )
+
+    if scan.cities:
+        st.subheader(f"Top {limit} Cities")
+        st.plotly_chart(
+            cities_figure(scan.cities[:limit]), use_container_width=True, key=f"{key}-cities"
+        )
+
+    if scan.versions:
+        st.subheader("Product Versions")
+        st.plotly_chart(
+            versions_figure(scan.versions[:limit]),
+            use_container_width=True,
+            key=f"{key}-versions",
+        )
+
+    for facet_name, facet_counts in scan.facets.items():
+        if not facet_counts:
+            continue
+        st.subheader(f"Top {limit} {facet_label(facet_name)}")
+        st.plotly_chart(
+            facet_figure(facet_name, facet_counts[:limit]),
+            use_container_width=True,
+            key=f"{key}-facet-{facet_name}",
+        )
+        max_error = max(f.error for f in facet_counts)
+        if max_error:
+            st.caption(f"Estimated counts; each may overestimate by up to {max_error:,}.")
+
+
+def _render_overview(scan: ScanResult, limit: int, key: str) -> None:
+    """Render metric cards, the map and the top-N charts for a result.
+
+    ``key`` namespaces the chart element ids so the overview can be redrawn
+    several times in one script run while results stream in.
+    """
+    _render_metrics(scan)
+    rows = country_rows(scan)
+    _render_map(rows, key)
+    _render_top_charts(scan, rows, limit, key)
+
+
+def _render_query_charts(qr: QueryResult) -> None:
+    """Render the country and city charts for a single query."""
+    if qr.countries:
+        st.plotly_chart(query_countries_figure(qr), use_container_width=True)
+    else:
+        st.write("No country results for this query.")
+
+    if qr.cities:
+        st.markdown("**Top cities for this query:**")
+        st.plotly_chart(cities_figure(qr.cities), use_container_width=True)
+
+
+@st.fragment
+def _render_query_breakdown(scan: ScanResult) -> None:
+    """Per-query expanders whose charts are only built while open.
+
+    Running as a fragment means opening an expander reruns just this
+    section, not the map and overview charts above it.
+    """
+    st.subheader("Per-Query Breakdown")
+    for i, qr in enumerate(scan.query_results):
+        expander = st.expander(
+            f"{qr.query} — {qr.total:,} total{' (upper bound)' if qr.upper_bound else ''}",
+            key=f"query-expander-{i}",
+            on_change="rerun",
+        )
+        with expander:
+            if expander.open:
+                _render_query_charts(qr)
+
+
+def _scan_sources(key: str, dumps: str) -> list[Source]:
+    """Shodan when an API key is set, plus a file source over ``dumps`` if given."""
+    selected: list[Source] = [ShodanSource(key)] if key else []
+    if dumps:
+        selected.append(source_from_spec(f"file:{dumps}"))
+    if not selected:
+        raise ValueError("Please enter a Shodan API key or offline dumps.")
+    return selected
+
+
+def _host_paths(source: str) -> tuple[str, ...]:
+    """Expand a comma-separated list of paths and glob patterns."""
+    paths: list[str] = []
+    for pattern in (p.strip() for p in source.split(",")):
+        if pattern:
+            paths.extend(sorted(glob.glob(os.path.expanduser(pattern))))
+    return tuple(paths)
+
+
+def _source_signature(paths: tuple[str, ...]) -> tuple[tuple[str, int, int], ...]:
+    """Modification times and sizes of every stored host file."""
+    files = []
+    for path in map(Path, paths):
+        for file in sorted(path.rglob("*.parquet")) if path.is_dir() else [path]:
+            stat = file.stat()
+            files.append((str(file), stat.st_mtime_ns, stat.st_size))
+    return tuple(files)
+
+
+@st.cache_resource(show_spinner="Indexing stored hosts...", max_entries=4)
+def _load_index(
+    paths: tuple[str, ...], signature: tuple[tuple[str, int, int], ...]
+) -> HostIndex:
+    """Build the host index once per set of files; ``signature`` busts the cache."""
+    del signature
+    return HostIndex.from_hosts(load_hosts(paths))
+
+
+_DRILLDOWN_LEVELS = (
+    ("query", "Query"),
+    ("country", "Country"),
+    ("city", "City"),
+    ("org", "Organization"),
+    ("version", "Version"),
+)
+
+
+def _display(dimension: str, value: str) -> str:
+    """Human-readable label for an index value."""
+    if not value:
+        return "(unknown)"
+    if dimension == "country":
+        return f"{country_name(value)} ({value})"
+    return value
+
+
+def _drilldown_filters(index: HostIndex) -> dict[str, list[str]]:
+    """Render the date slider and cascading filters; return the selection."""
+    filters: dict[str, list[str]] = {}
+
+    dates = [d for d in index.values["date"] if d]
+    if len(dates) > 1:
+        start, end = st.select_slider(
+            "Date range", options=dates, value=(dates[0], dates[-1]), key="drill-date"
+        )
+        if (start, end) != (dates[0], dates[-1]):
+            filters["date"] = [d for d in dates if start <= d <= end]
+
+    for column, (dimension, label) in zip(st.columns(len(_DRILLDOWN_LEVELS)), _DRILLDOWN_LEVELS):
+        options = dict(index.counts(dimension, index.select(filters)))
+        key = f"drill-{dimension}"
+        # Drop selections that a changed upstream filter made unavailable.
+        if key in st.session_state:
+            st.session_state[key] = [v for v in st.session_state[key] if v in options]
+        selected = column.multiselect(
+            label,
+            list(options),
+            key=key,
+            format_func=lambda v, d=dimension, o=options: f"{_display(d, v)} — {o[v]:,}",
+        )
+        if selected:
+            filters[dimension] = selected
+    return filters
+
+
+@st.fragment
+def _render_drilldown(index: HostIndex, limit: int) -> None:
+    """Cascading filters over stored hosts, answered from the host index.
+
+    Each level only offers values present under the filters above it, and
+    a filter change reruns just this fragment.
+    """
+    st.subheader("Drill-down")
+    rows = index.select(_drilldown_filters(index))
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Matching Hosts", f"{len(rows):,}")
+    col2.metric("Countries", len(index.counts("country", rows)))
+    col3.metric("Organizations", len(index.counts("org", rows)))
+    st.caption(
+        f"{len(index):,} stored host sightings; a host is counted once per query and day."
+    )
+
+    tabs = st.tabs([label for _, label in _DRILLDOWN_LEVELS[1:]] + ["Hosts"])
+    for tab, (dimension, label) in zip(tabs, _DRILLDOWN_LEVELS[1:]):
+        tab.dataframe(
+            [
+                {label: _display(dimension, value), "Hosts": count}
+                for value, count in index.counts(dimension, rows, top=limit)
+            ],
+            use_container_width=True,
+        )
+    tabs[-1].dataframe(index.records(rows), use_container_width=True)
 
 
 # ---------------------------------------------------------------------------
@@ -43,190 +281,142 @@ top_n = st.sidebar.number_input(
     value=20,
 )
 
+progressive = st.sidebar.checkbox(
+    "Progressive rendering",
+    value=True,
+    help="Draw charts as each query completes instead of after all of them.",
+)
+
+offline_dumps = st.sidebar.text_input(
+    "Offline dumps",
+    value="",
+    help="Host JSONL, masscan JSON or zgrab2 files to scan instead of, or as well as, "
+    "Shodan. Comma-separated; glob patterns allowed.",
+)
+
+concurrent_queries = st.sidebar.number_input(
+    "Concurrent queries",
+    min_value=1,
+    max_value=len(DEFAULT_QUERIES),
+    value=1,
+    help="Queries each source runs in parallel. Shodan may rate-limit concurrent requests.",
+)
+
+fingerprint = st.sidebar.checkbox(
+    "Fingerprint versions",
+    value=False,
+    help="Stream host banners to break results down by product version. "
+    "Uses Shodan query credits.",
+)
+
+host_facets = st.sidebar.checkbox(
+    "Org / ASN / port facets",
+    value=False,
+    help="Stream host records and track top organizations, ASNs and ports "
+    "in bounded memory. Uses Shodan query credits.",
+)
+
+host_limit = st.sidebar.number_input(
+    "Hosts per query",
+    min_value=1,
+    max_value=10000,
+    value=1000,
+    disabled=not (fingerprint or host_facets),
+)
+
+hosts_source = st.sidebar.text_input(
+    "Stored hosts",
+    value=os.environ.get("OPENCLAW_HOSTS", ""),
+    help="Host JSONL dumps (`scan --hosts-output`) or Parquet dataset directories "
+    "(`scan --dataset`) to drill into. Comma-separated; glob patterns allowed.",
+)
+
 run_clicked = st.sidebar.button("Run Query")
 
 if st.sidebar.button("Clear Results"):
     st.session_state.pop("scan_result", None)
     st.rerun()
 
+# ---------------------------------------------------------------------------
+# Main area
+# ---------------------------------------------------------------------------
+
+st.title("OpenClaw Tracker Dashboard")
+
 if run_clicked:
-    if not api_key:
-        st.sidebar.error("Please enter a Shodan API key.")
+    try:
+        sources = _scan_sources(api_key, offline_dumps)
+    except ValueError as exc:
+        st.sidebar.error(str(exc))
     else:
-        with st.spinner("Querying Shodan..."):
+        overview_slot = st.empty()
+        progress_slot = st.empty()
+        streamed: list[QueryResult] = []
+
+        def _on_result(qr: QueryResult) -> None:
+            """Redraw the overview from the queries that have completed so far."""
+            streamed.append(qr)
+            partial = merge_query_results(streamed)
+            with overview_slot.container():
+                _render_overview(partial, top_n, key=f"partial-{len(streamed)}")
+            with progress_slot.container():
+                st.subheader("Per-Query Breakdown")
+                for done in streamed:
+                    st.markdown(f"**{done.query}** — {done.total:,} total")
+                st.caption(f"{len(streamed)} of {len(DEFAULT_QUERIES)} queries complete")
+
+        with st.spinner("Running queries..."):
             try:
-                result = run_all_queries(
-                    api_key=api_key,
-                    top_countries=top_n,
+                result = run_sources(
+                    sources,
+                    top_n=top_n,
+                    on_result=_on_result if progressive else None,
+                    per_source_workers=concurrent_queries,
                 )
+                if fingerprint or host_facets:
+                    enrich_from_hosts(
+                        result,
+                        iter_source_hosts(sources, limit=host_limit),
+                        fingerprint=fingerprint,
+                        facets=host_facets,
+                        top_n=top_n,
+                    )
                 st.session_state["scan_result"] = result
-            except (shodan.APIError, OSError) as exc:
+            except (shodan.APIError, OSError, ValueError) as exc:
                 st.sidebar.error(f"Query failed: {exc}")
-
-# ---------------------------------------------------------------------------
-# Main area
-# ---------------------------------------------------------------------------
+            else:
+                # Redraw once from session state with the lazy, interactive layout.
+                st.rerun()
 
 result: ScanResult | None = st.session_state.get("scan_result")
 
-if result is None:
-    st.title("OpenClaw Tracker Dashboard")
-    st.info("Enter your Shodan API key in the sidebar and click **Run Query** to begin.")
-    st.stop()
-
-# --- Metric cards ---
-st.title("OpenClaw Tracker Dashboard")
-
-num_countries = len(result.countries)
-num_cities = len(result.cities)
-top_country = result.countries[0] if result.countries else None
-
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Total Instances", f"{result.total_instances:,}")
-col2.metric("Countries", num_countries)
-col3.metric("Cities", num_cities)
-if top_country:
-    col4.metric(
-        "Top Country",
-        top_country.country_name,
-        f"{top_country.count:,} instances",
-    )
+host_index: HostIndex | None = None
+host_paths = _host_paths(hosts_source)
+if host_paths:
+    try:
+        host_index = _load_index(host_paths, _source_signature(host_paths))
+    except (OSError, ValueError) as exc:
+        st.sidebar.error(f"Could not load stored hosts: {exc}")
 
-st.caption("Note: totals may include duplicates across queries.")
-st.caption(f"Data fetched at: {result.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-
-# --- Build dataframe rows ---
-rows = []
-for c in result.countries:
-    a3 = _alpha3(c.country_code)
-    if a3:
-        rows.append(
-            {
-                "country_code": c.country_code,
-                "alpha_3": a3,
-                "country_name": c.country_name,
-                "count": c.count,
-            }
+if result is None:
+    if host_index is not None:
+        _render_drilldown(host_index, top_n)
+    elif not run_clicked:
+        st.info(
+            "Enter your Shodan API key or offline dumps in the sidebar "
+            "and click **Run Query** to begin."
         )
+    st.stop()
 
-# --- Choropleth globe ---
-if rows:
-    st.subheader("World Map")
-    fig_map = px.choropleth(
-        rows,
-        locations="alpha_3",
-        color="count",
-        hover_name="country_name",
-        color_continuous_scale="Plasma",
-        labels={"count": "Instances", "alpha_3": "ISO Code"},
-    )
-    fig_map.update_geos(
-        projection_type="orthographic",
-        showcoastlines=True,
-        coastlinecolor="#555555",
-        showland=True,
-        landcolor="#1a1a2e",
-        showocean=True,
-        oceancolor="#0f0f1a",
-        showlakes=False,
-        showcountries=True,
-        countrycolor="#333333",
-        bgcolor="rgba(0,0,0,0)",
-    )
-    fig_map.update_layout(
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        height=600,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        coloraxis_colorbar={
-            "title": {"text": "Instances", "font": {"color": "#cccccc"}},
-            "tickfont": {"color": "#cccccc"},
-        },
-        dragmode="pan",
-    )
-    fig_map.update_traces(
-        marker_line_color="#444444",
-        marker_line_width=0.5,
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
-
-# --- Bar chart (top N) ---
-if rows:
-    st.subheader(f"Top {top_n} Countries")
-    bar_rows = rows[:top_n]
-    fig_bar = px.bar(
-        bar_rows,
-        x="count",
-        y="country_name",
-        orientation="h",
-        color="count",
-        color_continuous_scale="Blues",
-        labels={"count": "Instances", "country_name": "Country"},
-    )
-    fig_bar.update_layout(yaxis={"categoryorder": "total ascending"})
-    st.plotly_chart(fig_bar, use_container_width=True)
-
-# --- Top cities bar chart ---
-if result.cities:
-    st.subheader(f"Top {top_n} Cities")
-    city_rows = [
-        {"city": c.city, "count": c.count}
-        for c in result.cities[:top_n]
-    ]
-    fig_city = px.bar(
-        city_rows,
-        x="count",
-        y="city",
-        orientation="h",
-        color="count",
-        color_continuous_scale="Blues",
-        labels={"count": "Instances", "city": "City"},
-    )
-    fig_city.update_layout(yaxis={"categoryorder": "total ascending"})
-    st.plotly_chart(fig_city, use_container_width=True)
+_render_overview(result, top_n, key="final")
 
 # --- Per-query breakdown ---
 if result.query_results:
-    st.subheader("Per-Query Breakdown")
-    for qr in result.query_results:
-        with st.expander(f"{qr.query} — {qr.total:,} total"):
-            if qr.countries:
-                qr_rows = []
-                for c in qr.countries:
-                    qr_rows.append(
-                        {"country_name": c.country_name, "count": c.count}
-                    )
-                fig_qr = px.bar(
-                    qr_rows,
-                    x="count",
-                    y="country_name",
-                    orientation="h",
-                    color="count",
-                    color_continuous_scale="Blues",
-                    labels={"count": "Instances", "country_name": "Country"},
-                )
-                fig_qr.update_layout(yaxis={"categoryorder": "total ascending"})
-                st.plotly_chart(fig_qr, use_container_width=True)
-            else:
-                st.write("No country results for this query.")
-
-            if qr.cities:
-                st.markdown("**Top cities for this query:**")
-                qr_city_rows = [
-                    {"city": c.city, "count": c.count}
-                    for c in qr.cities
-                ]
-                fig_qr_city = px.bar(
-                    qr_city_rows,
-                    x="count",
-                    y="city",
-                    orientation="h",
-                    color="count",
-                    color_continuous_scale="Blues",
-                    labels={"count": "Instances", "city": "City"},
-                )
-                fig_qr_city.update_layout(yaxis={"categoryorder": "total ascending"})
-                st.plotly_chart(fig_qr_city, use_container_width=True)
+    _render_query_breakdown(result)
+
+# --- Drill-down over stored hosts ---
+if host_index is not None:
+    _render_drilldown(host_index, top_n)
 
 # --- Data table ---
 st.subheader("Country Data")
@@ -248,6 +438,14 @@ if result.cities:
     ]
     st.dataframe(city_table_rows, use_container_width=True)
 
+if result.versions:
+    st.subheader("Version Data")
+    version_table_rows = [
+        {"Product": v.product, "Version": v.version, "Instances": v.count}
+        for v in result.versions
+    ]
+    st.dataframe(version_table_rows, use_container_width=True)
+
 # --- JSON download ---
 st.subheader("Export")
 st.download_button(
@@ -0,0 +1,54 @@
+"""Host-level enrichment of scan results (versions and facets)."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from .fingerprint import fingerprint_hosts
+from .models import HostRecord, ScanResult
+from .sketches import HostFacets
+
+# Host facets added to ScanResult.facets; country and city already come
+# from the count API.
+HOST_FACETS = ("org", "asn", "port")
+
+
+def unique_hosts(hosts: Iterable[HostRecord]) -> Iterator[HostRecord]:
+    """Drop repeat sightings of an (ip, port) service, e.g. one matched by several queries."""
+    seen: set[tuple[str, int]] = set()
+    for host in hosts:
+        key = (host.ip.strip(), int(host.port))
+        if key not in seen:
+            seen.add(key)
+            yield host
+
+
+def enrich_from_hosts(  # pylint: disable=too-many-arguments
+    result: ScanResult,
+    hosts: Iterable[HostRecord],
+    *,
+    fingerprint: bool = False,
+    facets: bool = False,
+    top_n: int = 20,
+    workers: int | None = None,
+) -> None:
+    """Stream ``hosts`` once, filling ``result.versions`` and/or ``result.facets``.
+
+    Versions and facets count each (ip, port) service once, however many
+    queries matched it.
+    """
+    hosts = unique_hosts(hosts)
+    host_facets = HostFacets()
+    if facets:
+        hosts = host_facets.consume(hosts)
+
+    if fingerprint:
+        result.versions = fingerprint_hosts(hosts, workers=workers)
+    else:
+        for _ in hosts:
+            pass
+
+    if facets:
+        result.facets = {
+            dimension: host_facets.top(dimension, top_n) for dimension in HOST_FACETS
+        }
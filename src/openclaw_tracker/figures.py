@@ -0,0 +1,150 @@
+"""Plotly figure builders shared by the dashboard and the static HTML report."""
+
+from __future__ import annotations
+
+import plotly.express as px
+import plotly.graph_objects as go
+import pycountry
+
+from .models import CityCount, FacetCount, QueryResult, ScanResult, VersionCount
+from .sketches import FACET_LABELS
+
+
+def alpha3(code: str) -> str | None:
+    """Convert ISO alpha-2 country code to alpha-3 for Plotly choropleth."""
+    try:
+        return pycountry.countries.get(alpha_2=code).alpha_3
+    except (AttributeError, LookupError):
+        return None
+
+
+def country_rows(scan: ScanResult) -> list[dict]:
+    """Country rows with alpha-3 codes, skipping codes Plotly cannot map."""
+    rows = []
+    for c in scan.countries:
+        a3 = alpha3(c.country_code)
+        if a3:
+            rows.append(
+                {
+                    "country_code": c.country_code,
+                    "alpha_3": a3,
+                    "country_name": c.country_name,
+                    "count": c.count,
+                }
+            )
+    return rows
+
+
+def facet_label(name: str) -> str:
+    """Display label for a host facet."""
+    return FACET_LABELS.get(name, name.title())
+
+
+def map_figure(rows: list[dict]) -> go.Figure:
+    """Orthographic choropleth globe of instance counts."""
+    fig_map = px.choropleth(
+        rows,
+        locations="alpha_3",
+        color="count",
+        hover_name="country_name",
+        color_continuous_scale="Plasma",
+        labels={"count": "Instances", "alpha_3": "ISO Code"},
+    )
+    fig_map.update_geos(
+        projection_type="orthographic",
+        showcoastlines=True,
+        coastlinecolor="#555555",
+        showland=True,
+        landcolor="#1a1a2e",
+        showocean=True,
+        oceancolor="#0f0f1a",
+        showlakes=False,
+        showcountries=True,
+        countrycolor="#333333",
+        bgcolor="rgba(0,0,0,0)",
+    )
+    fig_map.update_layout(
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=600,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        coloraxis_colorbar={
+            "title": {"text": "Instances", "font": {"color": "#cccccc"}},
+            "tickfont": {"color": "#cccccc"},
+        },
+        dragmode="pan",
+    )
+    fig_map.update_traces(
+        marker_line_color="#444444",
+        marker_line_width=0.5,
+    )
+    return fig_map
+
+
+def countries_figure(rows: list[dict]) -> go.Figure:
+    """Horizontal bar chart of country rows."""
+    fig_bar = px.bar(
+        rows,
+        x="count",
+        y="country_name",
+        orientation="h",
+        color="count",
+        color_continuous_scale="Blues",
+        labels={"count": "Instances", "country_name": "Country"},
+    )
+    fig_bar.update_layout(yaxis={"categoryorder": "total ascending"})
+    return fig_bar
+
+
+def cities_figure(cities: list[CityCount]) -> go.Figure:
+    """Horizontal bar chart of city counts."""
+    fig_city = px.bar(
+        [{"city": c.city, "count": c.count} for c in cities],
+        x="count",
+        y="city",
+        orientation="h",
+        color="count",
+        color_continuous_scale="Blues",
+        labels={"count": "Instances", "city": "City"},
+    )
+    fig_city.update_layout(yaxis={"categoryorder": "total ascending"})
+    return fig_city
+
+
+def versions_figure(versions: list[VersionCount]) -> go.Figure:
+    """Horizontal bar chart of product versions, colored by product."""
+    fig_versions = px.bar(
+        [
+            {"label": f"{v.product} {v.version}", "product": v.product, "count": v.count}
+            for v in versions
+        ],
+        x="count",
+        y="label",
+        color="product",
+        orientation="h",
+        labels={"count": "Instances", "label": "Version", "product": "Product"},
+    )
+    fig_versions.update_layout(yaxis={"categoryorder": "total ascending"})
+    return fig_versions
+
+
+def facet_figure(name: str, counts: list[FacetCount]) -> go.Figure:
+    """Horizontal bar chart of one host facet's top values."""
+    fig_facet = px.bar(
+        [{"value": f.value, "count": f.count} for f in counts],
+        x="count",
+        y="value",
+        orientation="h",
+        color="count",
+        color_continuous_scale="Blues",
+        labels={"count": "Instances", "value": facet_label(name)},
+    )
+    fig_facet.update_layout(yaxis={"categoryorder": "total ascending", "type": "category"})
+    return fig_facet
+
+
+def query_countries_figure(qr: QueryResult) -> go.Figure:
+    """Country bar chart for a single query."""
+    return countries_figure(
+        [{"country_name": c.country_name, "count": c.count} for c in qr.countries]
+    )
@@ -0,0 +1,167 @@
+"""Product and version fingerprinting over Shodan host banners."""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import NamedTuple
+
+from .models import HostRecord, VersionCount
+
+UNKNOWN_VERSION = "unknown"
+
+# Semantic-ish version, optionally prefixed with "v" and suffixed with a
+# pre-release or build tag (1.4, 1.4.2, v2.0.0-beta.1, 0.9.3+a1b2c3).
+_VERSION = r"v?(\d+\.\d+(?:\.\d+)?(?:[-+][0-9A-Za-z][0-9A-Za-z.]*)?)"
+
+
+class Fingerprint(NamedTuple):
+    """Precompiled matchers for one product."""
+
+    product: str
+    detect: re.Pattern[str]
+    versions: tuple[re.Pattern[str], ...]
+
+
+def _fingerprint(product: str, aliases: tuple[str, ...]) -> Fingerprint:
+    """Compile the detection and version matchers for a product."""
+    names = "|".join(re.escape(a) for a in aliases)
+    return Fingerprint(
+        product=product,
+        detect=re.compile(rf"\b(?:{names})\b", re.IGNORECASE),
+        versions=(
+            # <meta name="generator" content="OpenClaw 1.4.2">
+            re.compile(
+                rf"<meta[^>]+name=[\"']generator[\"'][^>]+"
+                rf"content=[\"'](?:{names})[ /v]*{_VERSION}",
+                re.IGNORECASE,
+            ),
+            # "OpenClaw Control v1.4.2", "openclaw/1.4.2", "openclaw@1.4.2"
+            re.compile(
+                rf"\b(?:{names})(?:[ _-]?control)?[ /@:_-]*{_VERSION}",
+                re.IGNORECASE,
+            ),
+            # Versioned asset paths: /assets/openclaw-1.4.2.min.js
+            re.compile(rf"(?:{names})[-.]{_VERSION}(?:\.min)?\.(?:js|css)\b", re.IGNORECASE),
+            # Embedded app config, only when named after the product, so an
+            # unrelated library's version is never taken for the product's:
+            # __OPENCLAW_CONFIG__ = {"version": "1.4.2"}, data-openclaw-version="1.4.2"
+            re.compile(
+                rf"(?:(?:{names})[^{{}}<>]{{0,40}}\{{[^{{}}]*?\"(?:app_?)?version\"\s*:\s*"
+                rf"|data-(?:{names})-version=)[\"']{_VERSION}[\"']",
+                re.IGNORECASE,
+            ),
+        ),
+    )
+
+
+# Checked in order; the first product whose detector matches wins.
+FINGERPRINTS: tuple[Fingerprint, ...] = (
+    _fingerprint("OpenClaw", ("openclaw", "open-claw")),
+    _fingerprint("Moltbot", ("moltbot",)),
+    _fingerprint("Clawdbot", ("clawdbot",)),
+)
+
+# Fields shipped to worker processes: (title, banner, html, product, version).
+_HostFields = tuple[str, str, str, str, str]
+
+
+def _host_fields(host: HostRecord) -> _HostFields:
+    return (host.title, host.banner, host.html, host.product, host.version)
+
+
+def _match(fields: _HostFields) -> tuple[str, str] | None:
+    """Return ``(product, version)`` for one host, or None if unrecognised."""
+    title, banner, html, shodan_product, shodan_version = fields
+
+    # Prefer the page title, which is what DEFAULT_QUERIES match on, then
+    # fall back to Shodan's own product tag and the raw banner/HTML.
+    fp = next((f for f in FINGERPRINTS if f.detect.search(title)), None)
+    if fp is None:
+        fp = next((f for f in FINGERPRINTS if f.detect.search(shodan_product)), None)
+    if fp is None:
+        fp = next(
+            (f for f in FINGERPRINTS if f.detect.search(banner) or f.detect.search(html)),
+            None,
+        )
+    if fp is None:
+        return None
+
+    if shodan_version and fp.detect.search(shodan_product):
+        return fp.product, shodan_version
+
+    for text in (title, banner, html):
+        for pattern in fp.versions:
+            m = pattern.search(text)
+            if m:
+                return fp.product, m.group(1)
+    return fp.product, UNKNOWN_VERSION
+
+
+def fingerprint_host(host: HostRecord) -> tuple[str, str] | None:
+    """Identify the product and version served by a single host."""
+    return _match(_host_fields(host))
+
+
+def _fingerprint_batch(batch: list[_HostFields]) -> Counter[tuple[str, str]]:
+    """Worker entry point: fingerprint a batch of hosts."""
+    counts: Counter[tuple[str, str]] = Counter()
+    for fields in batch:
+        hit = _match(fields)
+        if hit is not None:
+            counts[hit] += 1
+    return counts
+
+
+def _batches(hosts: Iterable[HostRecord], size: int) -> Iterator[list[_HostFields]]:
+    it = iter(hosts)
+    while batch := [_host_fields(h) for h in islice(it, size)]:
+        yield batch
+
+
+def version_counts(counts: Counter[tuple[str, str]]) -> list[VersionCount]:
+    """Build a VersionCount list sorted by count, descending."""
+    return sorted(
+        [
+            VersionCount(product=product, version=version, count=count)
+            for (product, version), count in counts.items()
+        ],
+        key=lambda v: (-v.count, v.product, v.version),
+    )
+
+
+def fingerprint_hosts(
+    hosts: Iterable[HostRecord],
+    workers: int | None = None,
+    batch_size: int = 500,
+) -> list[VersionCount]:
+    """Fingerprint a stream of hosts across a process pool.
+
+    Hosts are consumed lazily in batches of ``batch_size``; at most two
+    batches per worker are in flight, so memory stays bounded no matter
+    how long the stream is. ``workers=1`` runs inline without a pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    totals: Counter[tuple[str, str]] = Counter()
+
+    if workers == 1:
+        for batch in _batches(hosts, batch_size):
+            totals.update(_fingerprint_batch(batch))
+        return version_counts(totals)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: set[Future[Counter[tuple[str, str]]]] = set()
+        for batch in _batches(hosts, batch_size):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    totals.update(fut.result())
+            pending.add(pool.submit(_fingerprint_batch, batch))
+        for fut in pending:
+            totals.update(fut.result())
+
+    return version_counts(totals)
@@ -0,0 +1,143 @@
+"""Inverted indexes over stored host records for fast drill-down filtering.
+
+Each dimension (query, date, country, city, org, version) is dictionary
+encoded: a list of distinct values plus one ``int32`` code per host row.
+A stable argsort of the codes groups row ids by value, so the posting list
+of every value is a sorted slice of one array. A filter is answered by
+concatenating the posting lists of the selected values per dimension and
+intersecting across dimensions, and counts under a filter are a single
+``np.bincount`` — no Python loop over hosts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+
+from .columnar import read_host_dataset
+from .fingerprint import fingerprint_host
+from .models import HostRecord
+from .reporter import read_hosts_jsonl
+
+DIMENSIONS = ("query", "date", "country", "city", "org", "version")
+
+
+def load_hosts(paths: Iterable[str | Path]) -> Iterator[HostRecord]:
+    """Stream hosts from JSONL dumps and Parquet dataset directories."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from read_host_dataset(path)
+        else:
+            yield from read_hosts_jsonl(path)
+
+
+def _scan_date(host: HostRecord) -> str:
+    """Date of the scan that stored ``host``.
+
+    Dumps written before scans stamped their hosts fall back to the crawl date.
+    """
+    return (host.scan_timestamp or host.timestamp)[:10]
+
+
+def _host_values(host: HostRecord, fingerprint: bool) -> tuple[str, ...]:
+    version = ""
+    if fingerprint:
+        hit = fingerprint_host(host)
+        version = f"{hit[0]} {hit[1]}" if hit else ""
+    return (host.query, _scan_date(host), host.country_code, host.city, host.org, version)
+
+
+class HostIndex:
+    """Dictionary-encoded host columns with one inverted index per dimension."""
+
+    def __init__(self, rows: list[tuple[str, ...]], ips: list[str], ports: list[int]) -> None:
+        self.ips = np.asarray(ips, dtype=object)
+        self.ports = np.asarray(ports, dtype=np.int32)
+        self.values: dict[str, list[str]] = {}
+        self.codes: dict[str, np.ndarray] = {}
+        self._lookup: dict[str, dict[str, int]] = {}
+        self._order: dict[str, np.ndarray] = {}
+        self._bounds: dict[str, np.ndarray] = {}
+        for i, dim in enumerate(DIMENSIONS):
+            uniques, codes = np.unique(
+                np.asarray([row[i] for row in rows], dtype=str), return_inverse=True
+            )
+            codes = codes.astype(np.int32)
+            self.values[dim] = uniques.tolist()
+            self.codes[dim] = codes
+            self._lookup[dim] = {value: code for code, value in enumerate(self.values[dim])}
+            # Row ids grouped by code; rows of code k are order[bounds[k]:bounds[k + 1]].
+            self._order[dim] = np.argsort(codes, kind="stable").astype(np.int32)
+            self._bounds[dim] = np.concatenate(
+                ([0], np.cumsum(np.bincount(codes, minlength=len(uniques))))
+            )
+
+    @classmethod
+    def from_hosts(cls, hosts: Iterable[HostRecord], fingerprint: bool = True) -> HostIndex:
+        """Build an index, counting a host once per query and scan date."""
+        seen: set[tuple[str, str, int, str]] = set()
+        rows, ips, ports = [], [], []
+        for host in hosts:
+            key = (host.query, host.ip, host.port, _scan_date(host))
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append(_host_values(host, fingerprint))
+            ips.append(host.ip)
+            ports.append(host.port)
+        return cls(rows, ips, ports)
+
+    def __len__(self) -> int:
+        return len(self.ports)
+
+    def postings(self, dimension: str, value: str) -> np.ndarray:
+        """Sorted row ids whose ``dimension`` equals ``value``."""
+        code = self._lookup[dimension].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        bounds = self._bounds[dimension]
+        return self._order[dimension][bounds[code] : bounds[code + 1]]
+
+    def select(self, filters: Mapping[str, Iterable[str]]) -> np.ndarray:
+        """Sorted row ids matching any selected value of every filtered dimension.
+
+        Dimensions with no selected values are unfiltered.
+        """
+        matches = []
+        for dimension, values in filters.items():
+            lists = [self.postings(dimension, v) for v in values]
+            if lists:
+                # Posting lists of distinct values are disjoint.
+                matches.append(np.sort(np.concatenate(lists)) if len(lists) > 1 else lists[0])
+        if not matches:
+            return np.arange(len(self), dtype=np.int32)
+        matches.sort(key=len)
+        rows = matches[0]
+        for other in matches[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def counts(
+        self, dimension: str, rows: np.ndarray | None = None, top: int | None = None
+    ) -> list[tuple[str, int]]:
+        """``(value, hosts)`` pairs for ``dimension`` within ``rows``, largest first."""
+        codes = self.codes[dimension] if rows is None else self.codes[dimension][rows]
+        totals = np.bincount(codes, minlength=len(self.values[dimension]))
+        nonzero = np.flatnonzero(totals)
+        ranked = nonzero[np.argsort(-totals[nonzero], kind="stable")][:top]
+        values = self.values[dimension]
+        return [(values[code], int(totals[code])) for code in ranked]
+
+    def records(self, rows: np.ndarray, limit: int = 1000) -> list[dict[str, object]]:
+        """Host rows for display, at most ``limit`` of them."""
+        rows = rows[:limit]
+        records: list[dict[str, object]] = [
+            {"ip": ip, "port": int(port)} for ip, port in zip(self.ips[rows], self.ports[rows])
+        ]
+        for dimension in DIMENSIONS:
+            values = self.values[dimension]
+            for record, code in zip(records, self.codes[dimension][rows].tolist()):
+                record[dimension] = values[code]
+        return records
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from typing import Any
 
@@ -24,6 +24,61 @@ class CityCount:
     count: int
 
 
+@dataclass
+class FacetCount:
+    """Instance count for a single value of a host facet (org, ASN, port).
+
+    ``error`` is the most ``count`` may exceed the true count; 0 when exact.
+    """
+
+    value: str
+    count: int
+    error: int = 0
+
+
+@dataclass
+class VersionCount:
+    """Instance count for a single product version."""
+
+    product: str
+    version: str
+    count: int
+
+
+@dataclass
+class HostRecord:  # pylint: disable=too-many-instance-attributes
+    """A single host banner returned by a Shodan search.
+
+    ``timestamp`` is when the banner was crawled; ``scan_timestamp`` is when
+    the scan that stored the host ran (empty for hosts not yet stored).
+    """
+
+    ip: str
+    port: int
+    query: str = ""
+    country_code: str = ""
+    city: str = ""
+    org: str = ""
+    asn: str = ""
+    timestamp: str = ""
+    title: str = ""
+    banner: str = ""
+    html: str = ""
+    product: str = ""
+    version: str = ""
+    scan_timestamp: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> HostRecord:
+        """Build a host record from a dict produced by ``to_dict``."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
 @dataclass
 class QueryResult:
     """Result of a single Shodan query (one search term)."""
@@ -32,10 +87,13 @@ class QueryResult:
     total: int
     countries: list[CountryCount] = field(default_factory=list)
     cities: list[CityCount] = field(default_factory=list)
+    # Summed across sources that cannot be deduplicated against each other,
+    # so a host seen by several of them is counted more than once.
+    upper_bound: bool = False
 
 
 @dataclass
-class ScanResult:
+class ScanResult:  # pylint: disable=too-many-instance-attributes
     """Aggregated results across all Shodan queries."""
 
     queries_run: list[str] = field(default_factory=list)
@@ -43,6 +101,8 @@ class ScanResult:
     countries: list[CountryCount] = field(default_factory=list)
     cities: list[CityCount] = field(default_factory=list)
     query_results: list[QueryResult] = field(default_factory=list)
+    versions: list[VersionCount] = field(default_factory=list)
+    facets: dict[str, list[FacetCount]] = field(default_factory=dict)
     timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
     def to_dict(self) -> dict[str, Any]:
@@ -79,7 +139,58 @@ class ScanResult:
                         {"city": c.city, "count": c.count}
                         for c in qr.cities
                     ],
+                    **({"upper_bound": True} if qr.upper_bound else {}),
                 }
                 for qr in self.query_results
             ],
+            "versions": [
+                {"product": v.product, "version": v.version, "count": v.count}
+                for v in self.versions
+            ],
+            "facets": {
+                name: [
+                    {"value": f.value, "count": f.count, **({"error": f.error} if f.error else {})}
+                    for f in counts
+                ]
+                for name, counts in self.facets.items()
+            },
         }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ScanResult:
+        """Build a scan result from a dict produced by ``to_dict``."""
+
+        def countries(items: list[dict[str, Any]]) -> list[CountryCount]:
+            return [
+                CountryCount(c["country_code"], c["country_name"], c["count"])
+                for c in items
+            ]
+
+        def cities(items: list[dict[str, Any]]) -> list[CityCount]:
+            return [CityCount(c["city"], c["count"]) for c in items]
+
+        return cls(
+            queries_run=list(data.get("queries_run", [])),
+            total_instances=data.get("total_instances", 0),
+            countries=countries(data.get("countries", [])),
+            cities=cities(data.get("cities", [])),
+            query_results=[
+                QueryResult(
+                    query=qr["query"],
+                    total=qr["total"],
+                    countries=countries(qr.get("countries", [])),
+                    cities=cities(qr.get("cities", [])),
+                    upper_bound=qr.get("upper_bound", False),
+                )
+                for qr in data.get("per_query", [])
+            ],
+            versions=[
+                VersionCount(v["product"], v["version"], v["count"])
+                for v in data.get("versions", [])
+            ],
+            facets={
+                name: [FacetCount(f["value"], f["count"], f.get("error", 0)) for f in counts]
+                for name, counts in data.get("facets", {}).items()
+            },
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+        )
@@ -0,0 +1,250 @@
+"""Static, self-contained HTML report of a scan result.
+
+The report renders the dashboard's views once: metric cards, the world
+map, top-N charts, the per-query breakdown and data tables. Each figure
+is serialized to Plotly JSON, gzipped and base64-encoded into the page,
+and the browser inflates it with ``DecompressionStream``. The Plotly
+bundle is written next to ``index.html`` once and shared by every figure.
+Per-query charts are only drawn when their ``<details>`` section is opened.
+The output directory can be served from any static host.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import html
+import json
+from pathlib import Path
+
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+from .figures import (
+    cities_figure,
+    countries_figure,
+    country_rows,
+    facet_figure,
+    facet_label,
+    map_figure,
+    query_countries_figure,
+    versions_figure,
+)
+from .models import ScanResult
+
+PLOTLY_BUNDLE = "plotly.min.js"
+
+_STYLE = """
+body { margin: 0 auto; max-width: 1200px; padding: 1.5rem; background: #0e1117;
+       color: #fafafa; font-family: system-ui, sans-serif; }
+h1, h2 { font-weight: 600; }
+.metrics { display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; }
+.metric { background: #1a1c24; border-radius: 0.5rem; padding: 1rem; }
+.metric .label { color: #a3a8b8; font-size: 0.9rem; }
+.metric .value { font-size: 1.8rem; }
+.caption { color: #a3a8b8; font-size: 0.85rem; }
+.figure { min-height: 450px; }
+details { background: #1a1c24; border-radius: 0.5rem; margin: 0.5rem 0; padding: 0.5rem 1rem; }
+summary { cursor: pointer; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border-bottom: 1px solid #31333f; padding: 0.3rem 0.6rem; text-align: left; }
+td.num { text-align: right; }
+a { color: #6fa8ff; }
+"""
+
+_SCRIPT = """
+const FIGURES = JSON.parse(document.getElementById("figures").textContent);
+
+async function decode(b64) {
+  const bytes = Uint8Array.from(atob(b64), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+}
+
+async function render(el) {
+  if (el.dataset.rendered) return;
+  el.dataset.rendered = "1";
+  const fig = await decode(FIGURES[el.dataset.figure]);
+  await Plotly.newPlot(el, fig.data, fig.layout, {responsive: true, displaylogo: false});
+}
+
+document.querySelectorAll(".figure").forEach((el) => {
+  if (!el.closest("details")) render(el);
+});
+document.querySelectorAll("details").forEach((section) => {
+  section.addEventListener("toggle", () => {
+    if (section.open) section.querySelectorAll(".figure").forEach(render);
+  });
+});
+"""
+
+
+def encode_figure(fig: go.Figure) -> str:
+    """Serialize a figure to gzipped, base64-encoded Plotly JSON."""
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+    return base64.b64encode(gzip.compress(fig.to_json().encode("utf-8"), mtime=0)).decode("ascii")
+
+
+def _cell(value: object) -> str:
+    if isinstance(value, int):
+        return f'<td class="num">{value:,}</td>'
+    return f"<td>{html.escape(str(value))}</td>"
+
+
+class _Page:
+    """Accumulates HTML fragments and the encoded figures they reference."""
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self.figures: dict[str, str] = {}
+
+    def add(self, markup: str) -> None:
+        """Append raw markup."""
+        self.parts.append(markup)
+
+    def figure(self, fig: go.Figure) -> None:
+        """Append a placeholder that the page script fills with ``fig``."""
+        fig_id = f"f{len(self.figures)}"
+        self.figures[fig_id] = encode_figure(fig)
+        self.parts.append(f'<div class="figure" data-figure="{fig_id}"></div>')
+
+    def table(self, headers: tuple[str, ...], rows: list[tuple[object, ...]]) -> None:
+        """Append an HTML table; integers are right-aligned with separators."""
+        head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+        body = "".join(
+            "<tr>" + "".join(_cell(v) for v in row) + "</tr>" for row in rows
+        )
+        self.parts.append(f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>")
+
+
+def _metrics(page: _Page, scan: ScanResult) -> None:
+    cards = [
+        ("Total Instances", f"{scan.total_instances:,}"),
+        ("Countries", str(len(scan.countries))),
+        ("Cities", str(len(scan.cities))),
+    ]
+    if scan.countries:
+        cards.append(("Top Country", scan.countries[0].country_name))
+    page.add(
+        '<div class="metrics">'
+        + "".join(
+            f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+            f'<div class="value">{html.escape(value)}</div></div>'
+            for label, value in cards
+        )
+        + "</div>"
+    )
+    bound = (
+        "Counts summed across sources are upper bounds: "
+        "a host seen by several sources is counted once per source.<br>"
+        if any(qr.upper_bound for qr in scan.query_results)
+        else ""
+    )
+    page.add(
+        '<p class="caption">Note: totals may include duplicates across queries.<br>'
+        f"{bound}Data fetched at: {scan.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>"
+    )
+
+
+def _charts(page: _Page, scan: ScanResult, limit: int) -> None:
+    rows = country_rows(scan)
+    if rows:
+        page.add("<h2>World Map</h2>")
+        page.figure(map_figure(rows))
+        page.add(f"<h2>Top {limit} Countries</h2>")
+        page.figure(countries_figure(rows[:limit]))
+    if scan.cities:
+        page.add(f"<h2>Top {limit} Cities</h2>")
+        page.figure(cities_figure(scan.cities[:limit]))
+    if scan.versions:
+        page.add("<h2>Product Versions</h2>")
+        page.figure(versions_figure(scan.versions[:limit]))
+    for name, counts in scan.facets.items():
+        if counts:
+            page.add(f"<h2>Top {limit} {html.escape(facet_label(name))}</h2>")
+            page.figure(facet_figure(name, counts[:limit]))
+            max_error = max(f.error for f in counts)
+            if max_error:
+                page.add(
+                    '<p class="caption">Estimated counts; '
+                    f"each may overestimate by up to {max_error:,}.</p>"
+                )
+
+
+def _query_breakdown(page: _Page, scan: ScanResult) -> None:
+    if not scan.query_results:
+        return
+    page.add("<h2>Per-Query Breakdown</h2>")
+    for qr in scan.query_results:
+        bound = " (upper bound)" if qr.upper_bound else ""
+        page.add(
+            f"<details><summary>{html.escape(qr.query)} — {qr.total:,} total{bound}</summary>"
+        )
+        if qr.countries:
+            page.figure(query_countries_figure(qr))
+        else:
+            page.add("<p>No country results for this query.</p>")
+        if qr.cities:
+            page.add("<p><strong>Top cities for this query:</strong></p>")
+            page.figure(cities_figure(qr.cities))
+        page.add("</details>")
+
+
+def _tables(page: _Page, scan: ScanResult) -> None:
+    page.add("<h2>Country Data</h2>")
+    page.table(
+        ("Country", "Code", "Instances"),
+        [(c.country_name, c.country_code, c.count) for c in scan.countries],
+    )
+    if scan.cities:
+        page.add("<h2>City Data</h2>")
+        page.table(("City", "Instances"), [(c.city, c.count) for c in scan.cities])
+    if scan.versions:
+        page.add("<h2>Version Data</h2>")
+        page.table(
+            ("Product", "Version", "Instances"),
+            [(v.product, v.version, v.count) for v in scan.versions],
+        )
+
+
+def render_html(scan: ScanResult, limit: int = 20) -> str:
+    """Render the report page; it expects ``plotly.min.js`` alongside it."""
+    page = _Page()
+    page.add("<h1>OpenClaw Tracker Report</h1>")
+    _metrics(page, scan)
+    _charts(page, scan, limit)
+    _query_breakdown(page, scan)
+    _tables(page, scan)
+    page.add('<h2>Export</h2><p><a href="scan.json" download>Download results as JSON</a></p>')
+
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        "<title>OpenClaw Tracker Report</title>"
+        f"<style>{_STYLE}</style></head><body>"
+        + "".join(page.parts)
+        + f'<script id="figures" type="application/json">{json.dumps(page.figures)}</script>'
+        + f'<script src="{PLOTLY_BUNDLE}"></script>'
+        + f"<script>{_SCRIPT}</script></body></html>\n"
+    )
+
+
+def write_html_report(scan: ScanResult, out_dir: str | Path, limit: int = 20) -> Path:
+    """Write ``index.html``, ``scan.json`` and the Plotly bundle to ``out_dir``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    bundle = get_plotlyjs().encode("utf-8")
+    bundle_path = out_dir / PLOTLY_BUNDLE
+    if not bundle_path.exists() or bundle_path.stat().st_size != len(bundle):
+        bundle_path.write_bytes(bundle)
+
+    (out_dir / "scan.json").write_text(json.dumps(scan.to_dict(), indent=2), encoding="utf-8")
+    index = out_dir / "index.html"
+    index.write_text(render_html(scan, limit), encoding="utf-8")
+    return index
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+import csv
 import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
+from typing import TextIO
 
 from rich.console import Console
 from rich.table import Table
 
-from .models import QueryResult, ScanResult
+from .anomaly import Alert
+from .models import FacetCount, HostRecord, QueryResult, ScanResult
+from .rows import ROW_FIELDS, merged_rows, query_rows
+from .sketches import FACET_LABELS
 
 console = Console()
+# File-written notices go to stderr so they never mix with piped output.
+err_console = Console(stderr=True)
+
+# Plain, machine-readable formats for RowWriter; "table" is the Rich output.
+ROW_FORMATS = ("csv", "tsv", "ndjson")
 
 
 def _bar(count: int, max_count: int, width: int = 30) -> str:
@@ -39,7 +50,69 @@ def print_query_result(qr: QueryResult) -> None:
         )
 
     console.print(table)
-    console.print(f"  Total instances for this query: [bold]{qr.total:,}[/bold]\n")
+    bound = " (upper bound, summed across sources)" if qr.upper_bound else ""
+    console.print(f"  Total instances for this query: [bold]{qr.total:,}[/bold]{bound}\n")
+
+
+def print_versions(result: ScanResult) -> None:
+    """Print the per-product, per-version breakdown as a Rich table."""
+    table = Table(title="Product Versions", title_style="bold yellow")
+    table.add_column("Product", style="white")
+    table.add_column("Version", style="dim")
+    table.add_column("Count", justify="right", style="green")
+    table.add_column("Distribution", style="blue")
+
+    max_count = result.versions[0].count if result.versions else 0
+    for v in result.versions:
+        table.add_row(
+            v.product,
+            v.version,
+            f"{v.count:,}",
+            _bar(v.count, max_count),
+        )
+
+    console.print(table)
+
+
+def print_facet(name: str, counts: list[FacetCount]) -> None:
+    """Print the top values of a host facet (org, ASN, port) as a Rich table."""
+    title = f"Top {FACET_LABELS.get(name, name.title())}"
+    table = Table(title=title, title_style="bold green")
+    table.add_column("Value", style="white")
+    table.add_column("Count", justify="right", style="green")
+    table.add_column("Distribution", style="blue")
+
+    max_count = counts[0].count if counts else 0
+    for f in counts:
+        table.add_row(f.value, f"{f.count:,}", _bar(f.count, max_count))
+
+    console.print(table)
+    max_error = max((f.error for f in counts), default=0)
+    if max_error:
+        console.print(f"[dim]Estimated counts; each may overestimate by up to {max_error:,}.[/dim]")
+
+
+def print_alerts(alerts: list[Alert], out: Console = console) -> None:
+    """Print anomaly alerts as a Rich table."""
+    if not alerts:
+        out.print("[dim]No anomalies detected.[/dim]")
+        return
+    table = Table(title="Anomalies", title_style="bold red")
+    table.add_column("Series", style="white")
+    table.add_column("Timestamp", style="dim")
+    table.add_column("Count", justify="right", style="green")
+    table.add_column("Expected", justify="right", style="dim")
+    table.add_column("z", justify="right", style="bold red")
+    for a in alerts:
+        table.add_row(
+            a.series,
+            a.timestamp,
+            f"{a.value:,}",
+            f"{a.expected:,.1f}",
+            f"{a.zscore:+.1f}",
+        )
+
+    out.print(table)
 
 
 def print_scan_result(result: ScanResult) -> None:
@@ -71,6 +144,12 @@ def print_scan_result(result: ScanResult) -> None:
 
         console.print(table)
 
+    if result.versions:
+        print_versions(result)
+
+    for name, counts in result.facets.items():
+        print_facet(name, counts)
+
     console.print()
     console.print(
         f"[bold]Total instances across all queries:[/bold] {result.total_instances:,}"
@@ -78,12 +157,95 @@ def print_scan_result(result: ScanResult) -> None:
     console.print(
         "[dim]Note: totals may include duplicates across queries.[/dim]"
     )
+    if any(qr.upper_bound for qr in result.query_results):
+        console.print(
+            "[dim]Counts summed across sources are upper bounds: "
+            "a host seen by several sources is counted once per source.[/dim]"
+        )
     console.print(f"[dim]Timestamp: {result.timestamp.isoformat()}[/dim]")
     console.print()
 
 
+class RowWriter:
+    """Stream result rows to a text stream as CSV, TSV or NDJSON.
+
+    Rows use the same long format as the Parquet export and are written
+    and flushed as soon as each query completes, bypassing Rich entirely.
+    """
+
+    def __init__(self, fmt: str, stream: TextIO) -> None:
+        if fmt not in ROW_FORMATS:
+            raise ValueError(f"Unknown row format {fmt!r}; expected one of {ROW_FORMATS}")
+        self.fmt = fmt
+        self.stream = stream
+        self._csv = None
+        if fmt != "ndjson":
+            self._csv = csv.writer(
+                stream,
+                delimiter="\t" if fmt == "tsv" else ",",
+                lineterminator="\n",
+            )
+            self._csv.writerow(ROW_FIELDS)
+
+    def write_rows(self, rows: Iterable[tuple[str, str, str, str, int]]) -> None:
+        """Write a batch of rows and flush the stream."""
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            self.stream.writelines(
+                json.dumps(dict(zip(ROW_FIELDS, row)), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        self.stream.flush()
+
+    def write_query(self, qr: QueryResult) -> None:
+        """Write the rows of a single completed query."""
+        self.write_rows(query_rows(qr))
+
+    def write_merged(self, result: ScanResult) -> None:
+        """Write the merged totals, countries, cities, versions and facets."""
+        self.write_rows(merged_rows(result))
+
+
 def write_json(result: ScanResult, path: str | Path) -> None:
     """Write scan results to a JSON file."""
     path = Path(path)
     path.write_text(json.dumps(result.to_dict(), indent=2), encoding="utf-8")
-    console.print(f"[green]Results written to {path}[/green]")
+    err_console.print(f"[green]Results written to {path}[/green]")
+
+
+def read_json(path: str | Path) -> ScanResult:
+    """Load a scan result written by ``write_json``."""
+    return ScanResult.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def write_output(result: ScanResult, path: str | Path) -> None:
+    """Write scan results to Parquet or JSON, chosen by file extension."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        # pyarrow is slow to import, so only Parquet output loads it.
+        # pylint: disable-next=import-outside-toplevel
+        from .columnar import write_parquet
+
+        write_parquet(result, path)
+        err_console.print(f"[green]Results written to {path}[/green]")
+    else:
+        write_json(result, path)
+
+
+def dump_hosts_jsonl(hosts: Iterable[HostRecord], path: str | Path) -> Iterator[HostRecord]:
+    """Append hosts to a JSONL file while passing them through."""
+    path = Path(path)
+    with path.open("a", encoding="utf-8") as fh:
+        for host in hosts:
+            fh.write(json.dumps(host.to_dict()) + "\n")
+            yield host
+    err_console.print(f"[green]Host records written to {path}[/green]")
+
+
+def read_hosts_jsonl(path: str | Path) -> Iterator[HostRecord]:
+    """Read host records written by ``dump_hosts_jsonl``, skipping blank lines."""
+    with Path(path).open(encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield HostRecord.from_dict(json.loads(line))
@@ -0,0 +1,52 @@
+"""Long-format result rows shared by the Parquet export and plain CLI output.
+
+A scan result is flattened into one ``(query, dimension, key, name, count)``
+row per value. ``dimension`` is one of ``total``, ``country``, ``city``,
+``version`` or ``facet:<name>``. Merged (all-query) rows use the query
+``"*"``. This module has no heavy dependencies, so streaming rows to a
+pipe does not load pyarrow.
+
+Rows carry counts only. Per-query counts summed over several sources
+(``QueryResult.upper_bound``) and facet counts with a non-zero ``error``
+are upper bounds that the rows do not mark; the JSON output keeps both.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+from .models import QueryResult, ScanResult
+
+ROW_FIELDS = ("query", "dimension", "key", "name", "count")
+
+MERGED_QUERY = "*"
+
+
+def merged_rows(result: ScanResult) -> Iterator[tuple[str, str, str, str, int]]:
+    """Yield the merged (all-query) ``(query, dimension, key, name, count)`` rows."""
+    yield MERGED_QUERY, "total", "", "", result.total_instances
+    for c in result.countries:
+        yield MERGED_QUERY, "country", c.country_code, c.country_name, c.count
+    for c in result.cities:
+        yield MERGED_QUERY, "city", c.city, c.city, c.count
+    for v in result.versions:
+        yield MERGED_QUERY, "version", f"{v.product} {v.version}", v.product, v.count
+    for facet, counts in result.facets.items():
+        for f in counts:
+            yield MERGED_QUERY, f"facet:{facet}", f.value, f.value, f.count
+
+
+def query_rows(qr: QueryResult) -> Iterator[tuple[str, str, str, str, int]]:
+    """Yield the ``(query, dimension, key, name, count)`` rows for one query."""
+    yield qr.query, "total", "", "", qr.total
+    for c in qr.countries:
+        yield qr.query, "country", c.country_code, c.country_name, c.count
+    for c in qr.cities:
+        yield qr.query, "city", c.city, c.city, c.count
+
+
+def snapshot_rows(result: ScanResult) -> Iterator[tuple[str, str, str, str, int]]:
+    """Yield every merged and per-query row for a scan result."""
+    yield from merged_rows(result)
+    for qr in result.query_results:
+        yield from query_rows(qr)
@@ -0,0 +1,296 @@
+"""Lightweight async HTTP API serving scan results as JSON.
+
+Every response body is serialized once, when the result files change, and
+kept in memory together with its gzip encoding and a strong ETag for
+each of the two representations. Request
+handling is then just header parsing and a dict lookup, so a single
+process serves thousands of requests per second without re-executing any
+application code per client.
+
+Endpoints (GET or HEAD)::
+
+    /api/latest                  full latest ScanResult
+    /api/latest/countries        merged country counts
+    /api/latest/cities           merged city counts
+    /api/latest/queries          per-query breakdown
+    /api/history                 timestamp and total of every snapshot
+    /api/trends                  total and per-country counts over time
+    /api/snapshots/<timestamp>   one snapshot by its ISO-8601 timestamp
+    /healthz                     liveness probe
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from .models import ScanResult
+from .reporter import read_json
+
+# Upper bound on request line plus headers; larger requests are rejected.
+_MAX_HEADER_BYTES = 16 * 1024
+
+_STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A pre-serialized JSON body with its gzip encoding and their ETags."""
+
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> CachedResponse:
+        """Serialize ``payload`` once and precompute everything a request needs."""
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong ETags must differ between the identity and gzip representations.
+        return cls(
+            body=body,
+            gzip_body=gzip.compress(body, mtime=0),
+            etag=f'"{digest}"',
+            gzip_etag=f'"{digest}-gz"',
+        )
+
+
+def _trends(results: list[ScanResult]) -> dict[str, Any]:
+    codes = sorted({c.country_code for r in results for c in r.countries})
+    series = {code: [0] * len(results) for code in codes}
+    for i, r in enumerate(results):
+        for c in r.countries:
+            series[c.country_code][i] = c.count
+    return {
+        "timestamps": [r.timestamp.isoformat() for r in results],
+        "total_instances": [r.total_instances for r in results],
+        "countries": series,
+    }
+
+
+def build_routes(results: list[ScanResult]) -> dict[str, CachedResponse]:
+    """Precompute every response for ``results`` (oldest first)."""
+    routes = {
+        "/healthz": CachedResponse.from_payload({"status": "ok", "snapshots": len(results)}),
+        "/api/history": CachedResponse.from_payload(
+            [
+                {"timestamp": r.timestamp.isoformat(), "total_instances": r.total_instances}
+                for r in results
+            ]
+        ),
+        "/api/trends": CachedResponse.from_payload(_trends(results)),
+    }
+    for r in results:
+        routes[f"/api/snapshots/{r.timestamp.isoformat()}"] = CachedResponse.from_payload(
+            r.to_dict()
+        )
+
+    if results:
+        latest = results[-1].to_dict()
+        routes["/api/latest"] = routes[f"/api/snapshots/{results[-1].timestamp.isoformat()}"]
+        routes["/api/latest/countries"] = CachedResponse.from_payload(latest["countries"])
+        routes["/api/latest/cities"] = CachedResponse.from_payload(latest["cities"])
+        routes["/api/latest/queries"] = CachedResponse.from_payload(latest["per_query"])
+    return routes
+
+
+class ResultStore:  # pylint: disable=too-few-public-methods
+    """Scan results loaded from ``*.json`` files in a directory."""
+
+    def __init__(self, data_dir: str | Path) -> None:
+        self.data_dir = Path(data_dir)
+        self.routes: dict[str, CachedResponse] = {}
+        self._signature: tuple[tuple[str, int, int], ...] | None = None
+
+    def _current_signature(self) -> tuple[tuple[str, int, int], ...]:
+        files = []
+        for path in sorted(self.data_dir.glob("*.json")):
+            stat = path.stat()
+            files.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(files)
+
+    def refresh(self) -> bool:
+        """Reload and re-render responses if any result file changed."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        results = []
+        for name, _, _ in signature:
+            try:
+                results.append(read_json(self.data_dir / name))
+            except (OSError, ValueError, KeyError, TypeError):
+                continue  # Not a scan result, or caught mid-write.
+        results.sort(key=lambda r: r.timestamp)
+        self.routes = build_routes(results)
+        self._signature = signature
+        return True
+
+
+def _response_head(status: int, headers: dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_STATUS_TEXT[status]}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _error(status: int, keep_alive: bool) -> bytes:
+    body = json.dumps({"error": _STATUS_TEXT[status]}).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    if status == 405:
+        headers["Allow"] = "GET, HEAD"
+    return _response_head(status, headers) + body
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an ``Accept-Encoding`` header allows gzip (q-values honoured)."""
+    qvalues: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        if coding:
+            qvalues[coding.lower()] = qvalue
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qvalues:
+            return qvalues[coding] > 0
+    return False
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def respond(
+    routes: dict[str, CachedResponse],
+    method: str,
+    target: str,
+    headers: dict[str, str],
+    keep_alive: bool = True,
+) -> bytes:
+    """Build the raw HTTP response for one parsed request."""
+    if method not in ("GET", "HEAD"):
+        return _error(405, keep_alive)
+    cached = routes.get(unquote(urlsplit(target).path).rstrip("/") or "/")
+    if cached is None:
+        return _error(404, keep_alive)
+
+    use_gzip = _accepts_gzip(headers.get("accept-encoding", ""))
+    common = {
+        "ETag": cached.gzip_etag if use_gzip else cached.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    if _etag_matches(headers.get("if-none-match", ""), common["ETag"]):
+        return _response_head(304, common)
+
+    body = cached.gzip_body if use_gzip else cached.body
+    head = {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        **common,
+    }
+    if use_gzip:
+        head["Content-Encoding"] = "gzip"
+    return _response_head(200, head) + (b"" if method == "HEAD" else body)
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, str, dict[str, str]] | None:
+    """Read one request head; None on a cleanly closed connection."""
+    try:
+        raw = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError as exc:
+        raise ValueError("request header too large") from exc
+
+    request_line, *header_lines = raw.decode("latin-1").split("\r\n")
+    parts = request_line.split(" ")
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    method, target, version = parts
+    return method, target, version, headers
+
+
+class APIServer:
+    """asyncio HTTP/1.1 server for a ResultStore, with periodic refresh."""
+
+    def __init__(self, store: ResultStore, refresh_interval: float = 30.0) -> None:
+        self.store = store
+        self.refresh_interval = refresh_interval
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError:
+                    writer.write(_error(400, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                connection = headers.get("connection", "").lower()
+                # Request bodies are never read, so close after anything but GET/HEAD.
+                keep_alive = (
+                    method in ("GET", "HEAD")
+                    and connection != "close"
+                    and (version == "HTTP/1.1" or connection == "keep-alive")
+                )
+                writer.write(respond(self.store.routes, method, target, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await asyncio.to_thread(self.store.refresh)
+
+    async def serve(self, host: str, port: int) -> None:
+        """Serve forever on ``host:port``."""
+        self.store.refresh()
+        server = await asyncio.start_server(self.handle, host, port, limit=_MAX_HEADER_BYTES)
+        refresher = asyncio.create_task(self._refresh_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from itertools import islice
+
 import shodan
 
-from .models import CityCount, CountryCount, QueryResult, ScanResult
+from .models import CityCount, CountryCount, HostRecord, QueryResult, ScanResult
 
 # Shodan search queries targeting OpenClaw and its predecessor names.
 DEFAULT_QUERIES = [
@@ -68,7 +71,8 @@ _COUNTRY_NAMES: dict[str, str] = {
 }
 
 
-def _country_name(code: str) -> str:
+def country_name(code: str) -> str:
+    """Readable name for a two-letter country code (the code itself if unknown)."""
     return _COUNTRY_NAMES.get(code, code)
 
 
@@ -81,7 +85,7 @@ def run_query(api: shodan.Shodan, query: str, top_n: int = 20) -> QueryResult:
         countries.append(
             CountryCount(
                 country_code=facet["value"],
-                country_name=_country_name(facet["value"]),
+                country_name=country_name(facet["value"]),
                 count=facet["count"],
             )
         )
@@ -103,21 +107,45 @@ def run_query(api: shodan.Shodan, query: str, top_n: int = 20) -> QueryResult:
     )
 
 
-def run_all_queries(
-    api_key: str,
-    queries: list[str] | None = None,
-    top_countries: int = 20,
-) -> ScanResult:
-    """Run all Shodan queries and merge results into a ScanResult."""
-    api = shodan.Shodan(api_key)
-    queries = queries or DEFAULT_QUERIES
+def host_record(match: dict, query: str) -> HostRecord:
+    """Flatten a Shodan search match into a HostRecord."""
+    location = match.get("location") or {}
+    http = match.get("http") or {}
+    return HostRecord(
+        ip=match.get("ip_str", ""),
+        port=match.get("port", 0),
+        query=query,
+        country_code=location.get("country_code") or "",
+        city=location.get("city") or "",
+        org=match.get("org") or "",
+        asn=match.get("asn") or "",
+        timestamp=match.get("timestamp") or "",
+        title=http.get("title") or "",
+        banner=match.get("data") or "",
+        html=http.get("html") or "",
+        product=match.get("product") or "",
+        version=match.get("version") or "",
+    )
+
 
-    scan = ScanResult(queries_run=list(queries))
+def iter_hosts(
+    api: shodan.Shodan,
+    query: str,
+    limit: int | None = None,
+) -> Iterator[HostRecord]:
+    """Stream host records for a query, page by page, up to ``limit`` hosts."""
+    matches = api.search_cursor(query)
+    for match in islice(matches, limit):
+        yield host_record(match, query)
+
+
+def merge_query_results(query_results: list[QueryResult]) -> ScanResult:
+    """Merge per-query results into a ScanResult with summed country/city counts."""
+    scan = ScanResult(queries_run=[qr.query for qr in query_results])
     merged_country_counts: dict[str, int] = {}
     merged_city_counts: dict[str, int] = {}
 
-    for query in queries:
-        qr = run_query(api, query, top_n=top_countries)
+    for qr in query_results:
         scan.query_results.append(qr)
         scan.total_instances += qr.total
 
@@ -136,7 +164,7 @@ def run_all_queries(
         [
             CountryCount(
                 country_code=code,
-                country_name=_country_name(code),
+                country_name=country_name(code),
                 count=count,
             )
             for code, count in merged_country_counts.items()
@@ -156,3 +184,14 @@ def run_all_queries(
     )
 
     return scan
+
+
+def run_all_queries(
+    api_key: str,
+    queries: list[str] | None = None,
+    top_countries: int = 20,
+) -> ScanResult:
+    """Run all Shodan queries and merge results into a ScanResult."""
+    api = shodan.Shodan(api_key)
+    queries = queries or DEFAULT_QUERIES
+    return merge_query_results([run_query(api, query, top_n=top_countries) for query in queries])
@@ -0,0 +1,167 @@
+"""Bounded-memory streaming aggregators for host-level facets.
+
+Exact per-value counters for org, ASN and port grow with the number
+of distinct values seen, which is unbounded over long watch runs. The
+sketches here use fixed memory and answer "top N" with known error:
+
+* ``SpaceSaving`` tracks at most ``capacity`` candidates. Every reported
+  count overestimates the true count by at most ``total / capacity``, and
+  every value whose true count exceeds that bound is guaranteed present.
+* ``CountMinSketch`` estimates the count of any value, overestimating by
+  at most ``epsilon * total`` with probability ``1 - delta``.
+
+``HostFacets`` combines both per dimension and reports the tighter of the
+two estimates, with each value's maximum overestimate.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from array import array
+from collections.abc import Iterable, Iterator
+
+from .models import FacetCount, HostRecord
+
+# Host dimensions tracked by HostFacets, in display order. Country and city
+# come exactly from the count API.
+FACET_DIMENSIONS = ("org", "asn", "port")
+
+FACET_LABELS = {
+    "org": "Organizations",
+    "asn": "ASNs",
+    "port": "Ports",
+}
+
+
+def _hash_pair(value: str) -> tuple[int, int]:
+    """Two independent 64-bit hashes of ``value``, stable across processes."""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+class CountMinSketch:
+    """Count-Min sketch with ``epsilon * total`` additive error bound."""
+
+    def __init__(self, epsilon: float = 1e-3, delta: float = 1e-3) -> None:
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.total = 0
+        self._rows = [array("q", bytes(8 * self.width)) for _ in range(self.depth)]
+
+    def _indexes(self, value: str) -> Iterator[tuple[array, int]]:
+        # Kirsch-Mitzenmacher: derive ``depth`` hashes from two.
+        h1, h2 = _hash_pair(value)
+        for i, row in enumerate(self._rows):
+            yield row, (h1 + i * h2) % self.width
+
+    def add(self, value: str, count: int = 1) -> None:
+        """Record ``count`` occurrences of ``value``."""
+        self.total += count
+        for row, idx in self._indexes(value):
+            row[idx] += count
+
+    def estimate(self, value: str) -> int:
+        """Estimated count of ``value``; never an underestimate."""
+        return min(row[idx] for row, idx in self._indexes(value))
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary over at most ``capacity`` values."""
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        # Lazy min-heap of (count-at-push, value); entries go stale when a
+        # value is incremented and are refreshed on eviction.
+        self._heap: list[tuple[int, str]] = []
+
+    def add(self, value: str, count: int = 1) -> None:
+        """Record ``count`` occurrences of ``value``."""
+        self.total += count
+        if value in self._counts:
+            self._counts[value] += count
+            return
+
+        if len(self._counts) < self.capacity:
+            self._counts[value] = count
+            self._errors[value] = 0
+            heapq.heappush(self._heap, (count, value))
+            return
+
+        # Evict the current minimum; the newcomer inherits its count as error.
+        while True:
+            recorded, victim = heapq.heappop(self._heap)
+            current = self._counts[victim]
+            if recorded == current:
+                break
+            heapq.heappush(self._heap, (current, victim))
+        del self._counts[victim]
+        del self._errors[victim]
+        self._counts[value] = current + count
+        self._errors[value] = current
+        heapq.heappush(self._heap, (current + count, value))
+
+    @property
+    def error_bound(self) -> int:
+        """Maximum overestimate of any reported count."""
+        return self.total // self.capacity if self.capacity else self.total
+
+    def top(self, n: int) -> list[tuple[str, int, int]]:
+        """The ``n`` heaviest values as ``(value, count, error)`` tuples."""
+        ranked = heapq.nlargest(n, self._counts.items(), key=lambda kv: (kv[1], kv[0]))
+        return [(value, count, self._errors[value]) for value, count in ranked]
+
+
+class HostFacets:
+    """Streaming top-k facets over host records in bounded memory."""
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        epsilon: float = 1e-3,
+        delta: float = 1e-3,
+    ) -> None:
+        self.hosts_seen = 0
+        self._summaries = {d: SpaceSaving(capacity) for d in FACET_DIMENSIONS}
+        self._sketches = {d: CountMinSketch(epsilon, delta) for d in FACET_DIMENSIONS}
+
+    def add(self, host: HostRecord) -> None:
+        """Ingest a single host record."""
+        self.hosts_seen += 1
+        values = {
+            "org": host.org,
+            "asn": host.asn,
+            "port": str(host.port) if host.port else "",
+        }
+        for dimension, value in values.items():
+            if value:
+                self._summaries[dimension].add(value)
+                self._sketches[dimension].add(value)
+
+    def consume(self, hosts: Iterable[HostRecord]) -> Iterator[HostRecord]:
+        """Ingest hosts while passing them through to a downstream consumer."""
+        for host in hosts:
+            self.add(host)
+            yield host
+
+    def top(self, dimension: str, n: int) -> list[FacetCount]:
+        """Top ``n`` values of ``dimension`` by estimated count.
+
+        Each count is at most ``error`` above the true count.
+        """
+        sketch = self._sketches[dimension]
+        counts = []
+        for value, count, error in self._summaries[dimension].top(n):
+            estimate = min(count, sketch.estimate(value))
+            # Space-Saving guarantees the true count is at least count - error.
+            counts.append(FacetCount(value=value, count=estimate, error=estimate - count + error))
+        counts.sort(key=lambda f: f.count, reverse=True)
+        return counts
+
+    def error_bound(self, dimension: str) -> int:
+        """Maximum overestimate of any count reported for ``dimension``."""
+        return self._summaries[dimension].error_bound
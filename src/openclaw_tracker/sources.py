@@ -0,0 +1,456 @@
+"""Pluggable scan data sources with concurrent fan-out and cross-source merging.
+
+A source answers two questions for a query: how many instances match, by
+country and city (``count``), and which hosts match (``hosts``). Scans run
+every source concurrently, each on its own thread pool, while a source's
+queries run in turn by default so API rate limits are respected. File
+sources are counted as one union deduplicated on ``(ip, port)``; counts
+from other sources are summed and flagged as upper bounds. Streamed hosts
+are deduplicated across sources on ``(query, ip, port)``.
+
+Two sources are built in:
+
+* ``ShodanSource`` — the Shodan count and search APIs.
+* ``FileSource`` — offline dumps: HostRecord JSONL (``scan --hosts-output``),
+  Shodan banner JSON lines, masscan JSON (``-oJ``/``-oD``) and zgrab2 HTTP
+  JSON lines, filtered with a small Shodan-style query matcher. It makes the
+  whole pipeline runnable and benchmarkable without network access or query
+  credits.
+
+Source specs for the CLI are ``shodan`` and ``file:<path or glob>``.
+"""
+
+from __future__ import annotations
+
+import glob
+import html
+import json
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Any, NamedTuple, Protocol
+
+import shodan
+
+from .models import CityCount, CountryCount, HostRecord, QueryResult, ScanResult
+from .shodan_query import (
+    DEFAULT_QUERIES,
+    country_name,
+    host_record,
+    iter_hosts,
+    merge_query_results,
+    run_query,
+)
+
+
+class Source(Protocol):
+    """A provider of per-query counts and host records."""
+
+    name: str
+
+    def count(self, query: str, top_n: int) -> QueryResult:
+        """Total, top countries and top cities matching ``query``."""
+
+    def hosts(self, query: str, limit: int | None = None) -> Iterator[HostRecord]:
+        """Stream up to ``limit`` host records matching ``query``."""
+
+
+class ShodanSource:
+    """Shodan count and search APIs."""
+
+    name = "shodan"
+
+    def __init__(self, api_key: str) -> None:
+        self.api = shodan.Shodan(api_key)
+
+    def count(self, query: str, top_n: int) -> QueryResult:
+        """Run a Shodan count query with country and city facets."""
+        return run_query(self.api, query, top_n=top_n)
+
+    def hosts(self, query: str, limit: int | None = None) -> Iterator[HostRecord]:
+        """Stream host records from Shodan search results."""
+        return iter_hosts(self.api, query, limit)
+
+
+# ---------------------------------------------------------------------------
+# Offline dumps
+# ---------------------------------------------------------------------------
+
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def _title(body: str) -> str:
+    match = _TITLE.search(body)
+    return html.unescape(match.group(1)).strip() if match else ""
+
+
+def _iso_timestamp(value: Any) -> str:
+    """masscan writes epoch seconds; keep anything else as-is."""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        return datetime.fromtimestamp(int(value), tz=timezone.utc).isoformat()
+    return str(value or "")
+
+
+def _masscan_records(record: dict[str, Any]) -> Iterator[HostRecord]:
+    """One host record per open port of a masscan result."""
+    for port in record.get("ports", []):
+        service = port.get("service") or {}
+        banner = service.get("banner") or ""
+        yield HostRecord(
+            ip=record.get("ip", ""),
+            port=int(port.get("port", 0)),
+            timestamp=_iso_timestamp(record.get("timestamp")),
+            banner=banner,
+            title=_title(banner),
+            product=service.get("name") or "",
+        )
+
+
+def _zgrab_record(record: dict[str, Any]) -> HostRecord | None:
+    """Host record for a successful zgrab2 HTTP grab."""
+    http = (record.get("data") or {}).get("http") or {}
+    response = (http.get("result") or {}).get("response") or {}
+    if not response:
+        return None
+    url = (response.get("request") or {}).get("url") or {}
+    host, _, port = str(url.get("host", "")).rpartition(":")
+    if not host or not port.isdigit():
+        port = "443" if url.get("scheme") == "https" else "80"
+    headers = response.get("headers") or {}
+    banner = "\r\n".join(
+        [f"HTTP/1.1 {response.get('status_code', '')}"]
+        + [
+            f"{name.replace('_', '-').title()}: {value}"
+            for name, values in headers.items()
+            if isinstance(values, list)
+            for value in values
+        ]
+    )
+    body = response.get("body") or ""
+    return HostRecord(
+        ip=record.get("ip", ""),
+        port=int(record.get("port") or port),
+        timestamp=str(http.get("timestamp") or ""),
+        title=_title(body),
+        banner=banner,
+        html=body,
+    )
+
+
+def normalize_record(record: Any) -> Iterator[HostRecord]:
+    """Convert one HostRecord, Shodan banner, masscan or zgrab2 JSON object into host records.
+
+    Raises ValueError for anything else.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    if isinstance(record.get("ports"), list):
+        yield from _masscan_records(record)
+    elif isinstance(record.get("data"), dict):
+        host = _zgrab_record(record)
+        if host is not None:
+            yield host
+    elif "ip_str" in record:
+        # Shodan banner, as written by ``shodan download`` or the search API.
+        yield host_record(record, "")
+    elif "ip" in record and "port" in record:
+        yield HostRecord.from_dict(record)
+    else:
+        raise ValueError("not a host record, Shodan banner, masscan or zgrab2 result")
+
+
+def _located(path: Path, where: str, records: Iterable[HostRecord]) -> Iterator[HostRecord]:
+    """Pass ``records`` through, naming the file and position of a bad record."""
+    try:
+        yield from records
+    except ValueError as exc:
+        raise ValueError(f"{path}:{where}: {exc}") from exc
+
+
+def read_scan_dump(path: str | Path) -> Iterator[HostRecord]:
+    """Read host records from a JSON array or JSON-lines dump in any supported format."""
+    path = Path(path)
+    with path.open(encoding="utf-8") as fh:
+        text = fh.read()
+    if text.lstrip().startswith("["):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError:
+            # masscan -oJ writes one object per line with a trailing comma.
+            records = None
+        if records is not None:
+            for i, record in enumerate(records, start=1):
+                yield from _located(path, f"record {i}", normalize_record(record))
+            return
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip().rstrip(",")
+        if line and line not in ("[", "]"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{lineno}: invalid JSON: {exc}") from exc
+            yield from _located(path, str(lineno), normalize_record(record))
+
+
+class QueryTerm(NamedTuple):
+    """One ``[-]field:value`` (or bare word) term of a query."""
+
+    field: str
+    value: str
+    negate: bool
+
+
+_TERM = re.compile(r'(-?)(?:([\w.]+):)?(?:"([^"]*)"|(\S+))')
+
+_TEXT_FIELDS = {
+    "title": ("title",),
+    "http.title": ("title",),
+    "html": ("html",),
+    "http.html": ("html",),
+    "org": ("org",),
+    "product": ("product",),
+    "": ("title", "banner", "html", "product"),
+}
+
+
+def parse_query(query: str) -> list[QueryTerm]:
+    """Split a Shodan-style query into terms; all terms must match."""
+    return [
+        QueryTerm(
+            field=(field or "").lower(),
+            value=quoted or bare,
+            negate=bool(neg),
+        )
+        for neg, field, quoted, bare in _TERM.findall(query)
+        if quoted or bare
+    ]
+
+
+def _term_matches(host: HostRecord, term: QueryTerm) -> bool:
+    value = term.value.lower()
+    if term.field == "port":
+        return value.isdigit() and host.port == int(value)
+    if term.field in ("country", "asn"):
+        field = host.country_code if term.field == "country" else host.asn
+        return field.lower() == value
+    if term.field == "city":
+        return host.city.lower() == value
+    if term.field in _TEXT_FIELDS:
+        return any(value in getattr(host, f).lower() for f in _TEXT_FIELDS[term.field])
+    return False  # Unsupported filters never match.
+
+
+def matches(host: HostRecord, terms: list[QueryTerm]) -> bool:
+    """True if ``host`` satisfies every term."""
+    return all(_term_matches(host, t) != t.negate for t in terms)
+
+
+class FileSource:
+    """Offline source over HostRecord, masscan and zgrab2 JSON dumps."""
+
+    def __init__(self, paths: Iterable[str | Path], name: str = "file") -> None:
+        self.paths = [Path(p) for p in paths]
+        self.name = name
+        self._records: list[HostRecord] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def records(self) -> list[HostRecord]:
+        """All records of every dump, loaded once and deduplicated on (ip, port)."""
+        with self._lock:
+            if self._records is None:
+                seen: set[tuple[str, int]] = set()
+                records = []
+                for path in self.paths:
+                    for host in read_scan_dump(path):
+                        if (host.ip, host.port) not in seen:
+                            seen.add((host.ip, host.port))
+                            records.append(host)
+                self._records = records
+        return self._records
+
+    def _matching(self, query: str) -> Iterator[HostRecord]:
+        terms = parse_query(query)
+        return (host for host in self.records if matches(host, terms))
+
+    def count(self, query: str, top_n: int) -> QueryResult:
+        """Exact total, top countries and top cities of matching records."""
+        total = 0
+        countries: Counter[str] = Counter()
+        cities: Counter[str] = Counter()
+        for host in self._matching(query):
+            total += 1
+            if host.country_code:
+                countries[host.country_code] += 1
+            if host.city:
+                cities[host.city] += 1
+        return QueryResult(
+            query=query,
+            total=total,
+            countries=[
+                CountryCount(country_code=code, country_name=country_name(code), count=count)
+                for code, count in countries.most_common(top_n)
+            ],
+            cities=[CityCount(city=city, count=count) for city, count in cities.most_common(top_n)],
+        )
+
+    def hosts(self, query: str, limit: int | None = None) -> Iterator[HostRecord]:
+        """Matching records, tagged with ``query``."""
+        for host in islice(self._matching(query), limit):
+            yield HostRecord.from_dict({**host.to_dict(), "query": query})
+
+
+def source_from_spec(spec: str, api_key: str | None = None) -> Source:
+    """Build a source from ``shodan`` or ``file:<path or glob>[,<path>...]``."""
+    kind, _, arg = spec.partition(":")
+    if kind == "shodan":
+        if not api_key:
+            raise ValueError("the shodan source needs an API key")
+        return ShodanSource(api_key)
+    if kind == "file":
+        paths = [p for pattern in arg.split(",") for p in sorted(glob.glob(pattern))]
+        if not paths:
+            raise ValueError(f"no files match {arg!r}")
+        return FileSource(paths, name=spec)
+    raise ValueError(f"unknown source {spec!r}; expected 'shodan' or 'file:<path>'")
+
+
+# ---------------------------------------------------------------------------
+# Fan-out
+# ---------------------------------------------------------------------------
+
+
+def _union_file_sources(sources: list[Source]) -> list[Source]:
+    """Replace every FileSource in ``sources`` with one over all of their dumps.
+
+    File sources can enumerate their hosts, so counting the union counts a
+    host found in several dumps once instead of once per source.
+    """
+    files = [s for s in sources if isinstance(s, FileSource)]
+    if len(files) < 2:
+        return list(sources)
+    union = FileSource([p for s in files for p in s.paths], name="+".join(s.name for s in files))
+    return [s for s in sources if not isinstance(s, FileSource)] + [union]
+
+
+def merge_source_results(results: list[QueryResult], top_n: int) -> QueryResult:
+    """Sum one query's results from several sources.
+
+    Sources cannot be deduplicated against each other, so a sum over more
+    than one source is flagged as an upper bound.
+    """
+    countries: Counter[str] = Counter()
+    cities: Counter[str] = Counter()
+    for qr in results:
+        countries.update({c.country_code: c.count for c in qr.countries})
+        cities.update({c.city: c.count for c in qr.cities})
+    return QueryResult(
+        query=results[0].query,
+        total=sum(qr.total for qr in results),
+        countries=[
+            CountryCount(country_code=code, country_name=country_name(code), count=count)
+            for code, count in countries.most_common(top_n)
+        ],
+        cities=[CityCount(city=city, count=count) for city, count in cities.most_common(top_n)],
+        upper_bound=len(results) > 1 or any(qr.upper_bound for qr in results),
+    )
+
+
+def run_sources(
+    sources: list[Source],
+    queries: list[str] | None = None,
+    top_n: int = 20,
+    on_result: Callable[[QueryResult], None] | None = None,
+    per_source_workers: int = 1,
+) -> ScanResult:
+    """Count every query on every source and merge into a ScanResult.
+
+    Sources run concurrently, each with its own pool of
+    ``per_source_workers`` threads, so a slow or rate-limited API never
+    holds up the others. File sources are first merged into one, so their
+    hosts are counted once. ``on_result`` receives each query's merged
+    result as soon as every source has answered it.
+    """
+    queries = queries or DEFAULT_QUERIES
+    sources = _union_file_sources(sources)
+    pending = {query: len(sources) for query in queries}
+    partial: dict[str, list[QueryResult]] = {query: [] for query in queries}
+    merged: dict[str, QueryResult] = {}
+
+    with ExitStack() as stack:
+        futures = {}
+        for source in sources:
+            pool = stack.enter_context(ThreadPoolExecutor(max_workers=per_source_workers))
+            for query in queries:
+                futures[pool.submit(source.count, query, top_n)] = query
+        for fut in as_completed(futures):
+            query = futures[fut]
+            partial[query].append(fut.result())
+            pending[query] -= 1
+            if not pending[query]:
+                merged[query] = merge_source_results(partial[query], top_n)
+                if on_result is not None:
+                    on_result(merged[query])
+
+    return merge_query_results([merged[query] for query in queries])
+
+
+_DONE = object()
+
+
+def iter_source_hosts(
+    sources: list[Source],
+    queries: list[str] | None = None,
+    limit: int | None = None,
+) -> Iterator[HostRecord]:
+    """Stream hosts from every source concurrently, deduplicated on (query, ip, port).
+
+    Each source streams its queries in turn on its own thread. ``limit``
+    applies per source and query. At most a few hundred hosts are buffered
+    between the source threads and the consumer.
+    """
+    queries = queries or DEFAULT_QUERIES
+    buffer: Queue[Any] = Queue(maxsize=512)
+    stop = threading.Event()
+
+    def produce(source: Source) -> None:
+        try:
+            for query in queries:
+                for host in source.hosts(query, limit):
+                    if stop.is_set():
+                        return
+                    buffer.put(host)
+        finally:
+            buffer.put(_DONE)
+
+    seen: set[tuple[str, str, int]] = set()
+    with ThreadPoolExecutor(max_workers=len(sources) or 1) as pool:
+        futures = [pool.submit(produce, source) for source in sources]
+        try:
+            remaining = len(sources)
+            while remaining:
+                item = buffer.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                key = (item.query, item.ip.strip(), int(item.port))
+                if key not in seen:
+                    seen.add(key)
+                    yield item
+        finally:
+            stop.set()
+            # Unblock producers waiting on a full buffer so the pool can shut down.
+            while not all(f.done() for f in futures):
+                try:
+                    buffer.get(timeout=0.1)
+                except Empty:
+                    pass
+    for fut in futures:
+        fut.result()
@@ -0,0 +1,481 @@
+"""Distributed scanning over a durable SQLite work queue.
+
+A coordinator writes the scan plan into a SQLite database; any number of
+worker processes (on this host, or on hosts sharing the file) lease tasks
+from it, and a final collect step aggregates completed tasks into one
+ScanResult. Task kinds:
+
+* ``facet`` — one facet sub-query (``country``, ``city``, and ``org``,
+  ``asn`` and ``port`` when no pages are fetched) of one search query via
+  the count API. The ``country`` task also plans the
+  query's ``page`` tasks once the total is known.
+* ``page`` — one page of search results, stored as host records; the last
+  page is cut at the host limit. Each page plans one ``enrich`` task.
+* ``enrich`` — fingerprint the hosts of one stored page. Hits are kept per
+  ``(ip, port)`` so that collect counts a host matched by several queries
+  once.
+
+Leases expire unless the owning worker heartbeats, so a crashed worker's
+task returns to the queue; the plan itself is idempotent, so re-running a
+coordinator or restarting workers never duplicates work.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import shodan
+
+from .enrich import HOST_FACETS, enrich_from_hosts
+from .fingerprint import fingerprint_host, version_counts
+from .models import CityCount, CountryCount, FacetCount, HostRecord, QueryResult, ScanResult
+from .shodan_query import DEFAULT_QUERIES, country_name, host_record, merge_query_results
+
+# Shodan returns 100 matches per search page.
+PAGE_SIZE = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    UNIQUE (kind, payload)
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, lease_expires);
+"""
+
+
+@dataclass(frozen=True)
+class Task:
+    """A leased unit of work."""
+
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+class WorkQueue:
+    """SQLite-backed task queue with leases and bounded retries."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 5,
+    ) -> None:
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+    def __enter__(self) -> WorkQueue:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    # -- plan ---------------------------------------------------------------
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable plan setting."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Read a plan setting stored with ``set_meta``."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def submit(self, kind: str, payload: dict[str, Any]) -> bool:
+        """Enqueue a task; returns False if an identical task already exists."""
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO tasks (kind, payload) VALUES (?, ?)",
+            (kind, json.dumps(payload, sort_keys=True)),
+        )
+        return cur.rowcount == 1
+
+    # -- leasing ------------------------------------------------------------
+
+    def claim(self, worker_id: str) -> Task | None:
+        """Lease the oldest runnable task, including ones whose lease expired."""
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self._db.execute(
+                    "SELECT id, kind, payload, attempts FROM tasks "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                task_id, kind, payload, attempts = row
+                if attempts < self.max_attempts:
+                    break
+                # Its last lease expired without completing: give up on it.
+                self._db.execute(
+                    "UPDATE tasks SET status = 'failed', owner = NULL, "
+                    "error = COALESCE(error, 'lease expired') WHERE id = ?",
+                    (task_id,),
+                )
+            self._db.execute(
+                "UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + self.lease_seconds, task_id),
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return Task(id=task_id, kind=kind, payload=json.loads(payload), attempts=attempts + 1)
+
+    def heartbeat(self, task_id: int, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer owns the task."""
+        cur = self._db.execute(
+            "UPDATE tasks SET lease_expires = ? "
+            "WHERE id = ? AND owner = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, task_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def complete(
+        self,
+        task_id: int,
+        worker_id: str,
+        result: Any,
+        follow_ups: list[tuple[str, dict[str, Any]]] | None = None,
+    ) -> bool:
+        """Store a task's result and enqueue its follow-up tasks atomically.
+
+        Returns False (and changes nothing) if the lease was lost to another
+        worker in the meantime.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self._db.execute(
+                "UPDATE tasks SET status = 'done', result = ?, owner = NULL, error = NULL "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (json.dumps(result), task_id, worker_id),
+            )
+            if cur.rowcount == 1:
+                for kind, payload in follow_ups or []:
+                    self.submit(kind, payload)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> None:
+        """Release a failed task for retry, or mark it failed for good."""
+        self._db.execute(
+            "UPDATE tasks SET owner = NULL, lease_expires = NULL, error = ?, "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE id = ? AND owner = ? AND status = 'leased'",
+            (error, self.max_attempts, task_id, worker_id),
+        )
+
+    # -- inspection ---------------------------------------------------------
+
+    def status_counts(self) -> dict[str, int]:
+        """Number of tasks in each status."""
+        return dict(
+            self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        )
+
+    def is_drained(self) -> bool:
+        """True when no task is pending or leased."""
+        row = self._db.execute(
+            "SELECT 1 FROM tasks WHERE status IN ('pending', 'leased') LIMIT 1"
+        ).fetchone()
+        return row is None
+
+    def result(self, task_id: int) -> Any:
+        """The stored result of a completed task."""
+        row = self._db.execute("SELECT result FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def results(self, kind: str) -> Iterator[tuple[int, dict[str, Any], Any]]:
+        """``(id, payload, result)`` for every completed task of ``kind``."""
+        rows = self._db.execute(
+            "SELECT id, payload, result FROM tasks WHERE kind = ? AND status = 'done' "
+            "ORDER BY id",
+            (kind,),
+        )
+        for task_id, payload, result in rows:
+            yield task_id, json.loads(payload), json.loads(result)
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+
+def plan_scan(
+    queue: WorkQueue,
+    queries: list[str] | None = None,
+    top_n: int = 20,
+    host_limit: int = 0,
+    facets: bool = False,
+) -> int:
+    """Write the scan plan and its initial facet tasks; returns tasks added.
+
+    Safe to re-run: existing tasks and their results are kept.
+    """
+    queries = queries or DEFAULT_QUERIES
+    queue.set_meta("queries", queries)
+    queue.set_meta("top_n", top_n)
+    queue.set_meta("host_limit", host_limit)
+    queue.set_meta("facets", facets)
+
+    # With a host limit, host facets come from the stored pages instead.
+    names = ["country", "city", *(HOST_FACETS if facets and not host_limit else ())]
+    added = 0
+    for query in queries:
+        for name in names:
+            added += queue.submit("facet", {"query": query, "facet": name, "top_n": top_n})
+    return added
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+
+def _run_facet(
+    api: shodan.Shodan, queue: WorkQueue, payload: dict[str, Any]
+) -> tuple[Any, list[tuple[str, dict[str, Any]]]]:
+    query, name = payload["query"], payload["facet"]
+    counts = api.count(query, facets=[(name, payload["top_n"])])
+    result = {
+        "total": counts.get("total", 0),
+        "values": [
+            [str(f["value"]), f["count"]] for f in counts.get("facets", {}).get(name, [])
+        ],
+    }
+    follow_ups = []
+    host_limit = queue.get_meta("host_limit", 0)
+    if name == "country" and host_limit:
+        pages = math.ceil(min(result["total"], host_limit) / PAGE_SIZE)
+        follow_ups = [("page", {"query": query, "page": p}) for p in range(1, pages + 1)]
+    return result, follow_ups
+
+
+def _run_page(
+    api: shodan.Shodan, queue: WorkQueue, task: Task
+) -> tuple[Any, list[tuple[str, dict[str, Any]]]]:
+    query, page_number = task.payload["query"], task.payload["page"]
+    page = api.search(query, page=page_number)
+    # Keep only the hosts within the limit; Shodan always returns whole pages.
+    keep = queue.get_meta("host_limit", 0) - (page_number - 1) * PAGE_SIZE
+    hosts = [host_record(m, query).to_dict() for m in page.get("matches", [])[:keep]]
+    return hosts, [("enrich", {"page_task": task.id})]
+
+
+def _run_enrich(queue: WorkQueue, payload: dict[str, Any]) -> Any:
+    hits = []
+    for host in queue.result(payload["page_task"]) or []:
+        record = HostRecord.from_dict(host)
+        hit = fingerprint_host(record)
+        if hit is not None:
+            hits.append([record.ip, record.port, *hit])
+    return hits
+
+
+class _Heartbeat:
+    """Background thread that keeps a task's lease alive while it runs."""
+
+    def __init__(self, db_path: Path, task: Task, worker_id: str, lease_seconds: float) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(db_path, task.id, worker_id, lease_seconds),
+            daemon=True,
+        )
+
+    def _run(self, db_path: Path, task_id: int, worker_id: str, lease_seconds: float) -> None:
+        # SQLite connections are per-thread, so the heartbeat opens its own.
+        with WorkQueue(db_path, lease_seconds=lease_seconds) as queue:
+            while not self._stop.wait(lease_seconds / 3):
+                if not queue.heartbeat(task_id, worker_id):
+                    return
+
+    def __enter__(self) -> _Heartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(
+    db_path: str | Path,
+    api_key: str,
+    worker_id: str | None = None,
+    lease_seconds: float = 60.0,
+    poll_interval: float = 1.0,
+) -> int:
+    """Process tasks until the queue is drained; returns tasks completed."""
+    db_path = Path(db_path)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    api = shodan.Shodan(api_key)
+    completed = 0
+
+    with WorkQueue(db_path, lease_seconds=lease_seconds) as queue:
+        while True:
+            task = queue.claim(worker_id)
+            if task is None:
+                if queue.is_drained():
+                    return completed
+                # Other workers hold leases that may yet spawn follow-ups.
+                time.sleep(poll_interval)
+                continue
+
+            try:
+                with _Heartbeat(db_path, task, worker_id, lease_seconds):
+                    if task.kind == "facet":
+                        result, follow_ups = _run_facet(api, queue, task.payload)
+                    elif task.kind == "page":
+                        result, follow_ups = _run_page(api, queue, task)
+                    elif task.kind == "enrich":
+                        result, follow_ups = _run_enrich(queue, task.payload), []
+                    else:
+                        raise ValueError(f"unknown task kind {task.kind!r}")
+            except (shodan.APIError, OSError, ValueError) as exc:
+                queue.fail(task.id, worker_id, str(exc))
+                continue
+
+            if queue.complete(task.id, worker_id, result, follow_ups):
+                completed += 1
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+
+def _read_facets(
+    queue: WorkQueue,
+) -> tuple[
+    dict[str, int], dict[tuple[str, str], list[list[Any]]], dict[str, dict[str, list[int]]]
+]:
+    """Per-query totals, per-query country/city values and per-query host facet counts."""
+    totals: dict[str, int] = {}
+    per_query: dict[tuple[str, str], list[list[Any]]] = {}
+    host_facets: dict[str, dict[str, list[int]]] = {name: {} for name in HOST_FACETS}
+    for _, payload, result in queue.results("facet"):
+        query, name = payload["query"], payload["facet"]
+        totals[query] = result["total"]
+        if name in HOST_FACETS:
+            for value, count in result["values"]:
+                host_facets[name].setdefault(value, []).append(count)
+        else:
+            per_query[(query, name)] = result["values"]
+    return totals, per_query, host_facets
+
+
+def _summed_facet(counts: dict[str, list[int]], top_n: int) -> list[FacetCount]:
+    """Sum per-query counts of one facet.
+
+    A host matched by several queries is counted once per query, so the sum
+    overestimates by at most the counts beyond the largest single query's.
+    """
+    summed = [
+        FacetCount(value=value, count=sum(per_query), error=sum(per_query) - max(per_query))
+        for value, per_query in counts.items()
+    ]
+    return sorted(summed, key=lambda f: f.count, reverse=True)[:top_n]
+
+
+def _page_hosts(queue: WorkQueue) -> Iterator[HostRecord]:
+    """Every host record stored by a page task."""
+    for _, _, hosts in queue.results("page"):
+        for host in hosts:
+            yield HostRecord.from_dict(host)
+
+
+def collect(queue: WorkQueue) -> ScanResult:
+    """Aggregate every completed task into a single ScanResult."""
+    queries: list[str] = queue.get_meta("queries", [])
+    top_n: int = queue.get_meta("top_n", 20)
+    totals, per_query, host_facets = _read_facets(queue)
+
+    query_results = [
+        QueryResult(
+            query=query,
+            total=totals.get(query, 0),
+            countries=[
+                CountryCount(country_code=code, country_name=country_name(code), count=count)
+                for code, count in per_query.get((query, "country"), [])
+            ],
+            cities=[
+                CityCount(city=city, count=count)
+                for city, count in per_query.get((query, "city"), [])
+            ],
+        )
+        for query in queries
+    ]
+    scan = merge_query_results(query_results)
+
+    # Pages of different queries can return the same service; count it once.
+    hits = {
+        (ip, port): (product, version)
+        for _, _, result in queue.results("enrich")
+        for ip, port, product, version in result
+    }
+    scan.versions = version_counts(Counter(hits.values()))
+
+    if queue.get_meta("facets", False):
+        if queue.get_meta("host_limit", 0):
+            # Like scan --facets: from the stored hosts, each (ip, port) once.
+            enrich_from_hosts(scan, _page_hosts(queue), facets=True, top_n=top_n)
+        else:
+            scan.facets = {
+                name: _summed_facet(counts, top_n) for name, counts in host_facets.items()
+            }
+    return scan
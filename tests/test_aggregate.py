@@ -0,0 +1,106 @@
+"""Tests for parallel map-reduce aggregation over host dumps."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from openclaw_tracker.aggregate import _chunk_bytes, _split_ranges, aggregate_host_files
+from openclaw_tracker.models import HostRecord
+
+
+def _write(path: Path, hosts: list[HostRecord]) -> Path:
+    path.write_text(
+        "".join(json.dumps(h.to_dict()) + "\n" for h in hosts), encoding="utf-8"
+    )
+    return path
+
+
+def _hosts() -> list[HostRecord]:
+    return [
+        HostRecord(ip="192.0.2.1", port=18789, query="q1", country_code="US", city="NYC"),
+        HostRecord(ip="192.0.2.2", port=18789, query="q1", country_code="US", city="NYC"),
+        HostRecord(ip="192.0.2.3", port=18789, query="q1", country_code="DE", city="Berlin"),
+        HostRecord(ip="192.0.2.1", port=18789, query="q2", country_code="US", city="NYC"),
+    ]
+
+
+class TestSplitRanges:
+    def test_ranges_cover_file(self, tmp_path: Path):
+        path = _write(tmp_path / "a.jsonl", _hosts())
+        size = path.stat().st_size
+        ranges = _split_ranges([path], chunk_bytes=50)
+        assert ranges[0][1] == 0
+        assert ranges[-1][2] == size
+        for (_, _, end), (_, start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+
+    def test_empty_file_has_no_ranges(self, tmp_path: Path):
+        path = tmp_path / "empty.jsonl"
+        path.write_text("")
+        assert not _split_ranges([path], chunk_bytes=50)
+
+
+    def test_chunk_size_scales_with_workers(self, tmp_path: Path):
+        path = tmp_path / "big.jsonl"
+        path.write_bytes(b"x" * (16 * 1024 * 1024))
+        assert _chunk_bytes([path], workers=4) == 4 * 1024 * 1024
+        assert len(_split_ranges([path], _chunk_bytes([path], workers=8))) == 8
+        # Small inputs are not split below the floor.
+        assert _chunk_bytes([path], workers=1000) == 1024 * 1024
+
+
+class TestAggregateHostFiles:
+    @pytest.mark.parametrize("by", ["ip", "country"])
+    def test_counts_and_dedup_across_files(self, tmp_path: Path, by: str):
+        first = _write(tmp_path / "scan1.jsonl", _hosts())
+        # A later scan sees one host again plus one new host.
+        second = _write(
+            tmp_path / "scan2.jsonl",
+            [
+                _hosts()[0],
+                HostRecord(ip="192.0.2.9", port=443, query="q2", country_code="FR"),
+            ],
+        )
+
+        result = aggregate_host_files([first, second], by=by, partitions=3, workers=2)
+
+        assert result.queries_run == ["q1", "q2"]
+        assert result.total_instances == 5
+        totals = {qr.query: qr.total for qr in result.query_results}
+        assert totals == {"q1": 3, "q2": 2}
+
+        countries = {c.country_code: c.count for c in result.countries}
+        assert countries == {"US": 3, "DE": 1, "FR": 1}
+        assert result.countries[0].country_name == "United States"
+        cities = {c.city: c.count for c in result.cities}
+        assert cities == {"NYC": 3, "Berlin": 1}
+
+    def test_matches_across_chunk_boundaries(self, tmp_path: Path, monkeypatch):
+        hosts = [
+            HostRecord(ip=f"198.51.100.{i}", port=80, query="q", country_code="US")
+            for i in range(200)
+        ]
+        path = _write(tmp_path / "big.jsonl", hosts)
+        monkeypatch.setattr("openclaw_tracker.aggregate._CHUNK_BYTES", 97)
+
+        result = aggregate_host_files([path], partitions=4, workers=2)
+
+        assert result.total_instances == 200
+        assert result.countries[0].count == 200
+
+    def test_top_n_truncates_per_query_lists(self, tmp_path: Path):
+        path = _write(tmp_path / "a.jsonl", _hosts())
+        result = aggregate_host_files([path], workers=1, top_n=1)
+        q1 = next(qr for qr in result.query_results if qr.query == "q1")
+        assert len(q1.countries) == 1
+        assert len(result.countries) == 2
+
+    def test_no_input(self):
+        result = aggregate_host_files([], workers=1)
+        assert result.total_instances == 0
+        assert result.countries == []
+
+    def test_unknown_partition_key(self, tmp_path: Path):
+        with pytest.raises(ValueError):
+            aggregate_host_files([], by="city")
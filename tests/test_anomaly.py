@@ -0,0 +1,130 @@
+"""Tests for streaming anomaly detection."""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from openclaw_tracker.anomaly import (
+    AnomalyDetector,
+    append_alerts_jsonl,
+    post_alerts,
+    series_values,
+)
+from openclaw_tracker.models import CityCount, CountryCount, QueryResult, ScanResult
+
+T0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _scan(hour: int, us: int, de: int = 200) -> ScanResult:
+    qr = QueryResult(
+        query="q1",
+        total=us + de,
+        countries=[CountryCount("US", "United States", us), CountryCount("DE", "Germany", de)],
+        cities=[CityCount("Berlin", de // 2)],
+    )
+    return ScanResult(
+        queries_run=["q1"],
+        total_instances=qr.total,
+        countries=list(qr.countries),
+        cities=list(qr.cities),
+        query_results=[qr],
+        timestamp=T0 + timedelta(hours=hour),
+    )
+
+
+def _warm(detector: AnomalyDetector, hours: int = 10) -> None:
+    for h in range(hours):
+        assert detector.update(_scan(h, 1000 + (h % 3) * 5)) == []
+
+
+class TestAnomalyDetector:
+    def test_series_values(self):
+        values = series_values(_scan(0, 100))
+        assert values == {
+            "total": 300,
+            "country:US": 100,
+            "country:DE": 200,
+            "city:Berlin": 100,
+            "query:q1": 300,
+        }
+
+    def test_spike_alerts_after_warmup(self):
+        detector = AnomalyDetector()
+        _warm(detector)
+        alerts = detector.update(_scan(10, 1500))
+        series = {a.series for a in alerts}
+        assert "country:US" in series
+        assert "country:DE" not in series
+        us = next(a for a in alerts if a.series == "country:US")
+        assert us.value == 1500
+        assert us.zscore > 3
+
+    def test_no_alerts_during_warmup(self):
+        detector = AnomalyDetector(warmup=5)
+        detector.update(_scan(0, 1000))
+        assert detector.update(_scan(1, 5000)) == []
+
+    def test_replayed_scans_are_ignored(self):
+        detector = AnomalyDetector()
+        _warm(detector)
+        n = detector.series["country:US"].n
+        assert detector.update(_scan(3, 9999)) == []
+        assert detector.series["country:US"].n == n
+
+    def test_state_round_trip(self, tmp_path):
+        path = tmp_path / "state.json"
+        detector = AnomalyDetector()
+        _warm(detector)
+        detector.save(path)
+
+        restored = AnomalyDetector.load(path)
+        assert restored.series == detector.series
+        assert restored.last_timestamp == detector.last_timestamp
+        assert [a.series for a in restored.update(_scan(10, 1500))] == [
+            a.series for a in detector.update(_scan(10, 1500))
+        ]
+
+    def test_missing_state_starts_fresh(self, tmp_path):
+        assert AnomalyDetector.load(tmp_path / "none.json").series == {}
+
+    def test_rejects_bad_alpha(self):
+        with pytest.raises(ValueError):
+            AnomalyDetector(alpha=0)
+
+
+class TestSinks:
+    def _alerts(self):
+        detector = AnomalyDetector()
+        _warm(detector)
+        return detector.update(_scan(10, 1500))
+
+    def test_jsonl(self, tmp_path):
+        path = tmp_path / "alerts.jsonl"
+        alerts = self._alerts()
+        append_alerts_jsonl(alerts, path)
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["series"] for line in lines] == [a.series for a in alerts]
+
+    def test_webhook(self):
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                received.append(json.loads(self.rfile.read(length)))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        post_alerts(self._alerts(), f"http://127.0.0.1:{server.server_port}/hook")
+        thread.join()
+        server.server_close()
+        assert "country:US" in {a["series"] for a in received[0]["alerts"]}
@@ -0,0 +1,102 @@
+"""Tests for the delta-encoded snapshot archive."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from openclaw_tracker.archive import DELTA, MAGIC, SnapshotArchive, _HEADER
+from openclaw_tracker.models import (
+    CityCount,
+    CountryCount,
+    FacetCount,
+    QueryResult,
+    ScanResult,
+    VersionCount,
+)
+
+T0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _snapshot(hour: int) -> ScanResult:
+    us = 100 + hour
+    qr = QueryResult(
+        query="q1",
+        total=us + 40,
+        countries=[
+            CountryCount("US", "United States", us),
+            CountryCount("DE", "Germany", 40),
+        ],
+        cities=[CityCount("Berlin", 30)],
+        upper_bound=hour >= 5,
+    )
+    return ScanResult(
+        queries_run=["q1"],
+        total_instances=us + 40,
+        countries=list(qr.countries),
+        cities=list(qr.cities),
+        query_results=[qr],
+        versions=[VersionCount("OpenClaw", "1.4.2", 12)],
+        facets={"org": [FacetCount("Hetzner", 9, 2), FacetCount("OVH", 4)]} if hour % 2 else {},
+        timestamp=T0 + timedelta(hours=hour),
+    )
+
+
+class TestSnapshotArchive:
+    def test_round_trip_every_snapshot(self, tmp_path):
+        path = tmp_path / "scans.ocz"
+        snapshots = [_snapshot(h) for h in range(10)]
+        SnapshotArchive(path, keyframe_interval=4).extend(snapshots)
+
+        archive = SnapshotArchive(path)
+        assert len(archive) == 10
+        assert archive.timestamps() == [s.timestamp for s in snapshots]
+        for expected in snapshots:
+            assert archive.load(expected.timestamp).to_dict() == expected.to_dict()
+        assert [s.to_dict() for s in archive] == [s.to_dict() for s in snapshots]
+
+    def test_load_at_or_before(self, tmp_path):
+        archive = SnapshotArchive(tmp_path / "scans.ocz")
+        archive.extend([_snapshot(0), _snapshot(5)])
+        assert archive.load(T0 + timedelta(hours=3)).timestamp == T0
+        assert archive.load().timestamp == T0 + timedelta(hours=5)
+        with pytest.raises(KeyError):
+            archive.load(T0 - timedelta(seconds=1))
+
+    def test_deltas_are_smaller_than_keyframes(self, tmp_path):
+        archive = SnapshotArchive(tmp_path / "scans.ocz", keyframe_interval=24)
+        keyframe = archive.append(_snapshot(0))
+        delta = archive.append(_snapshot(2))
+        assert delta < keyframe
+        assert delta < len(json.dumps(_snapshot(2).to_dict()))
+
+    def test_rejects_out_of_order_append(self, tmp_path):
+        archive = SnapshotArchive(tmp_path / "scans.ocz")
+        archive.append(_snapshot(1))
+        with pytest.raises(ValueError):
+            archive.append(_snapshot(0))
+
+    def test_truncated_frame_is_dropped(self, tmp_path):
+        path = tmp_path / "scans.ocz"
+        SnapshotArchive(path).extend([_snapshot(0), _snapshot(1)])
+        with path.open("ab") as fh:
+            fh.write(b"\x01partial")
+
+        archive = SnapshotArchive(path)
+        assert len(archive) == 2
+        archive.append(_snapshot(2))
+        reopened = SnapshotArchive(path)
+        assert len(reopened) == 3
+        assert reopened.load().to_dict() == _snapshot(2).to_dict()
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "scan.json"
+        path.write_text("{}")
+        with pytest.raises(ValueError):
+            SnapshotArchive(path)
+
+    def test_rejects_leading_delta_frame(self, tmp_path):
+        path = tmp_path / "scans.ocz"
+        path.write_bytes(MAGIC + _HEADER.pack(DELTA, 0, 2) + b"{}")
+        with pytest.raises(ValueError, match="corrupt"):
+            SnapshotArchive(path)
@@ -0,0 +1,129 @@
+"""Tests for Parquet export and the partitioned dataset layout."""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from openclaw_tracker.columnar import (
+    HostDatasetWriter,
+    write_parquet,
+    write_snapshot_dataset,
+)
+from openclaw_tracker.models import (
+    CityCount,
+    CountryCount,
+    FacetCount,
+    HostRecord,
+    QueryResult,
+    ScanResult,
+    VersionCount,
+)
+from openclaw_tracker.rows import MERGED_QUERY
+
+TS = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _result() -> ScanResult:
+    return ScanResult(
+        queries_run=['title:"OpenClaw Control"'],
+        total_instances=10,
+        countries=[CountryCount("US", "United States", 7)],
+        cities=[CityCount("NYC", 5)],
+        query_results=[
+            QueryResult(
+                query='title:"OpenClaw Control"',
+                total=10,
+                countries=[CountryCount("US", "United States", 7)],
+                cities=[CityCount("NYC", 5)],
+            ),
+        ],
+        versions=[VersionCount("OpenClaw", "1.4.2", 3)],
+        facets={"port": [FacetCount("18789", 9)]},
+        timestamp=TS,
+    )
+
+
+class TestWriteParquet:
+    def test_long_format_rows(self, tmp_path: Path):
+        out = tmp_path / "results.parquet"
+        write_parquet(_result(), out)
+
+        rows = pq.read_table(out).to_pylist()
+        merged = [r for r in rows if r["query"] == MERGED_QUERY]
+        assert {"dimension": "total", "count": 10} in [
+            {"dimension": r["dimension"], "count": r["count"]}
+            for r in merged
+        ]
+        country = next(r for r in merged if r["dimension"] == "country")
+        assert country["key"] == "US"
+        assert country["name"] == "United States"
+        assert country["timestamp"] == TS
+        assert any(r["dimension"] == "version" and r["key"] == "OpenClaw 1.4.2" for r in merged)
+        assert any(r["dimension"] == "facet:port" for r in merged)
+
+        per_query = [r for r in rows if r["query"] == 'title:"OpenClaw Control"']
+        assert {r["dimension"] for r in per_query} == {"total", "country", "city"}
+
+    def test_empty_result(self, tmp_path: Path):
+        out = tmp_path / "empty.parquet"
+        write_parquet(ScanResult(timestamp=TS), out)
+        assert pq.read_table(out).num_rows == 1
+
+
+class TestSnapshotDataset:
+    def test_hive_partitions(self, tmp_path: Path):
+        paths = write_snapshot_dataset(_result(), tmp_path)
+
+        assert len(paths) == 2
+        dirs = {p.parent.relative_to(tmp_path).as_posix() for p in paths}
+        assert "snapshots/date=2025-01-15/query=%2A" in dirs
+        assert "snapshots/date=2025-01-15/query=title%3A%22OpenClaw%20Control%22" in dirs
+
+        dataset = ds.dataset(tmp_path / "snapshots", partitioning="hive")
+        table = dataset.to_table(filter=ds.field("query") == 'title:"OpenClaw Control"')
+        assert table.num_rows == 3
+        assert "query" not in pq.read_schema(paths[0]).names
+
+    def test_appending_snapshots(self, tmp_path: Path):
+        write_snapshot_dataset(_result(), tmp_path)
+        later = _result()
+        later.timestamp = TS.replace(hour=13)
+        write_snapshot_dataset(later, tmp_path)
+
+        table = ds.dataset(tmp_path / "snapshots", partitioning="hive").to_table()
+        assert len(set(table.column("timestamp").to_pylist())) == 2
+
+
+class TestHostDatasetWriter:
+    def test_batches_into_partitions(self, tmp_path: Path):
+        hosts = [
+            HostRecord(ip=f"192.0.2.{i}", port=18789, query="q1" if i % 2 else "q2")
+            for i in range(25)
+        ]
+        with HostDatasetWriter(tmp_path, TS, batch_size=4) as writer:
+            passed = list(writer.consume(hosts))
+
+        assert passed == hosts
+        assert writer.rows_written == 25
+        q1 = tmp_path / "hosts/date=2025-01-15/query=q1"
+        files = list(q1.glob("*.parquet"))
+        assert len(files) == 1
+        assert pq.ParquetFile(files[0]).metadata.num_row_groups > 1
+
+        table = ds.dataset(tmp_path / "hosts", partitioning="hive").to_table()
+        assert table.num_rows == 25
+        assert table.column("scan_timestamp")[0].as_py() == TS
+
+    def test_duckdb_can_query_dataset(self, tmp_path: Path):
+        duckdb = pytest.importorskip("duckdb")
+        write_snapshot_dataset(_result(), tmp_path)
+        glob = (tmp_path / "snapshots" / "**" / "*.parquet").as_posix()
+        count = duckdb.sql(
+            f"SELECT sum(count) FROM read_parquet('{glob}', hive_partitioning = true) "
+            "WHERE dimension = 'country' AND date = '2025-01-15' "
+            "AND query = 'title:\"OpenClaw Control\"'"
+        ).fetchone()[0]
+        assert count == 7
@@ -0,0 +1,46 @@
+"""Tests for enriching scan results with versions and host facets."""
+
+from openclaw_tracker.enrich import enrich_from_hosts
+from openclaw_tracker.models import FacetCount, HostRecord, ScanResult
+
+
+class TestEnrichFromHosts:
+    def test_facets_only(self):
+        result = ScanResult()
+        hosts = [HostRecord(ip="192.0.2.1", port=443, org="A", asn="AS64500")]
+        enrich_from_hosts(result, hosts, facets=True, top_n=5)
+
+        assert set(result.facets) == {"org", "asn", "port"}
+        assert result.facets["asn"][0].value == "AS64500"
+        assert not result.versions
+
+    def test_fingerprint_only(self):
+        result = ScanResult()
+        hosts = [HostRecord(ip="192.0.2.1", port=443, title="OpenClaw Control v1.0.0")]
+        enrich_from_hosts(result, hosts, fingerprint=True, workers=1)
+
+        assert result.versions[0].version == "1.0.0"
+        assert not result.facets
+
+    def test_versions_count_each_service_once(self):
+        result = ScanResult()
+        title = "OpenClaw Control v1.0.0"
+        hosts = [
+            HostRecord(ip="192.0.2.1", port=18789, query="q1", title=title),
+            # Same service matched by a second query.
+            HostRecord(ip="192.0.2.1", port=18789, query="q2", title=title),
+            HostRecord(ip="192.0.2.1", port=443, query="q2", title=title),
+        ]
+        enrich_from_hosts(result, hosts, fingerprint=True, workers=1)
+
+        assert result.versions[0].count == 2
+
+    def test_facets_count_each_service_once(self):
+        result = ScanResult()
+        hosts = [
+            HostRecord(ip="192.0.2.1", port=443, query="q1", org="A"),
+            HostRecord(ip="192.0.2.1", port=443, query="q2", org="A"),
+        ]
+        enrich_from_hosts(result, hosts, facets=True)
+
+        assert result.facets["org"] == [FacetCount("A", 1)]
@@ -0,0 +1,94 @@
+"""Tests for banner fingerprinting."""
+
+from openclaw_tracker.fingerprint import (
+    UNKNOWN_VERSION,
+    fingerprint_host,
+    fingerprint_hosts,
+)
+from openclaw_tracker.models import HostRecord
+
+
+def _host(**kwargs) -> HostRecord:
+    return HostRecord(ip="192.0.2.1", port=18789, **kwargs)
+
+
+class TestFingerprintHost:
+    def test_version_in_title(self):
+        host = _host(title="OpenClaw Control v1.4.2")
+        assert fingerprint_host(host) == ("OpenClaw", "1.4.2")
+
+    def test_generator_meta_tag(self):
+        host = _host(
+            title="Moltbot Control",
+            html='<meta name="generator" content="Moltbot 0.9.3-beta.1">',
+        )
+        assert fingerprint_host(host) == ("Moltbot", "0.9.3-beta.1")
+
+    def test_versioned_asset_path(self):
+        host = _host(
+            title="Clawdbot Control",
+            html='<script src="/assets/clawdbot-2.1.0.min.js"></script>',
+        )
+        assert fingerprint_host(host) == ("Clawdbot", "2.1.0")
+
+    def test_embedded_config_version(self):
+        host = _host(
+            title="OpenClaw Control",
+            html='<script>window.__OPENCLAW_CONFIG__ = {"version": "1.2.0"}</script>',
+        )
+        assert fingerprint_host(host) == ("OpenClaw", "1.2.0")
+        host = _host(title="Moltbot Control", html='<div data-moltbot-version="0.9.1">')
+        assert fingerprint_host(host) == ("Moltbot", "0.9.1")
+
+    def test_unrelated_config_version_is_ignored(self):
+        host = _host(
+            title="OpenClaw Control",
+            html='<script>var openclaw = {"name": "openclaw"}; '
+            'window.chartLib = {"version": "3.6.0"}</script><div data-version="2.0.1">',
+        )
+        assert fingerprint_host(host) == ("OpenClaw", UNKNOWN_VERSION)
+
+    def test_product_without_version(self):
+        host = _host(title="OpenClaw Control")
+        assert fingerprint_host(host) == ("OpenClaw", UNKNOWN_VERSION)
+
+    def test_banner_only_match(self):
+        host = _host(banner="HTTP/1.1 200 OK\r\nServer: openclaw/1.3.0\r\n")
+        assert fingerprint_host(host) == ("OpenClaw", "1.3.0")
+
+    def test_title_takes_precedence_over_body(self):
+        host = _host(title="OpenClaw Control", html="Formerly known as Moltbot 0.8.0")
+        assert fingerprint_host(host)[0] == "OpenClaw"
+
+    def test_shodan_version_field(self):
+        host = _host(product="OpenClaw", version="1.5.0")
+        assert fingerprint_host(host) == ("OpenClaw", "1.5.0")
+
+    def test_unrelated_host(self):
+        host = _host(title="nginx welcome page", banner="Server: nginx/1.25.3")
+        assert fingerprint_host(host) is None
+
+
+class TestFingerprintHosts:
+    def test_counts_and_sorting_inline(self):
+        hosts = [
+            _host(title="OpenClaw Control v1.4.2"),
+            _host(title="OpenClaw Control v1.4.2"),
+            _host(title="Moltbot Control v0.9.0"),
+            _host(title="nothing here"),
+        ]
+        versions = fingerprint_hosts(hosts, workers=1, batch_size=3)
+
+        assert [(v.product, v.version, v.count) for v in versions] == [
+            ("OpenClaw", "1.4.2", 2),
+            ("Moltbot", "0.9.0", 1),
+        ]
+
+    def test_process_pool_matches_inline(self):
+        hosts = [_host(title=f"OpenClaw Control v1.{i % 3}.0") for i in range(50)]
+        inline = fingerprint_hosts(hosts, workers=1, batch_size=7)
+        pooled = fingerprint_hosts(iter(hosts), workers=2, batch_size=7)
+        assert pooled == inline
+
+    def test_empty_stream(self):
+        assert not fingerprint_hosts([], workers=2)
@@ -0,0 +1,120 @@
+"""Tests for the inverted host index."""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from openclaw_tracker.columnar import HostDatasetWriter
+from openclaw_tracker.index import HostIndex, load_hosts
+from openclaw_tracker.models import HostRecord
+from openclaw_tracker.reporter import dump_hosts_jsonl
+
+
+def _hosts() -> list[HostRecord]:
+    def host(ip, query, country, city, org, day, title="OpenClaw Control"):
+        return HostRecord(
+            ip=ip,
+            port=18789,
+            query=query,
+            country_code=country,
+            city=city,
+            org=org,
+            timestamp=f"2026-10-{day:02d}T12:00:00.000000",
+            title=title,
+        )
+
+    return [
+        host("192.0.2.1", "q1", "US", "Ashburn", "Amazon", 1, "OpenClaw Control v1.4.2"),
+        host("192.0.2.2", "q1", "US", "Dallas", "Linode", 1),
+        host("192.0.2.3", "q1", "DE", "Berlin", "Hetzner", 2, "OpenClaw Control v1.4.2"),
+        host("192.0.2.4", "q2", "DE", "Berlin", "Hetzner", 2),
+        host("192.0.2.5", "q2", "FR", "Paris", "OVH", 3),
+        # Same host, same query, same day: counted once.
+        host("192.0.2.1", "q1", "US", "Ashburn", "Amazon", 1, "OpenClaw Control v1.4.2"),
+    ]
+
+
+class TestHostIndex:
+    def test_dedups_per_query_and_day(self):
+        assert len(HostIndex.from_hosts(_hosts())) == 5
+
+    def test_postings_are_sorted_row_ids(self):
+        index = HostIndex.from_hosts(_hosts())
+        assert index.postings("country", "US").tolist() == [0, 1]
+        assert index.postings("country", "DE").tolist() == [2, 3]
+        assert index.postings("country", "JP").tolist() == []
+
+    def test_select_unions_values_and_intersects_dimensions(self):
+        index = HostIndex.from_hosts(_hosts())
+        assert index.select({}).tolist() == [0, 1, 2, 3, 4]
+        assert index.select({"country": ["US", "FR"]}).tolist() == [0, 1, 4]
+        assert index.select({"query": ["q1"], "country": ["DE"]}).tolist() == [2]
+        assert index.select({"query": ["q2"], "city": ["Ashburn"]}).tolist() == []
+        assert index.select({"date": ["2026-10-02"], "country": []}).tolist() == [2, 3]
+
+    def test_counts_under_filter(self):
+        index = HostIndex.from_hosts(_hosts())
+        assert index.counts("country") == [("DE", 2), ("US", 2), ("FR", 1)]
+        rows = index.select({"query": ["q1"]})
+        assert index.counts("org", rows, top=2) == [("Amazon", 1), ("Hetzner", 1)]
+        assert dict(index.counts("version", rows)) == {"OpenClaw 1.4.2": 2, "OpenClaw unknown": 1}
+
+    def test_records(self):
+        index = HostIndex.from_hosts(_hosts())
+        records = index.records(index.select({"city": ["Paris"]}))
+        assert records == [
+            {
+                "ip": "192.0.2.5",
+                "port": 18789,
+                "query": "q2",
+                "date": "2026-10-03",
+                "country": "FR",
+                "city": "Paris",
+                "org": "OVH",
+                "version": "OpenClaw unknown",
+            }
+        ]
+
+    def test_empty(self):
+        index = HostIndex.from_hosts([])
+        assert len(index) == 0
+        assert index.counts("country") == []
+        assert isinstance(index.select({"country": ["US"]}), np.ndarray)
+
+
+class TestLoadHosts:
+    def test_jsonl_and_dataset(self, tmp_path):
+        hosts = _hosts()
+        jsonl = tmp_path / "hosts.jsonl"
+        list(dump_hosts_jsonl(hosts[:3], jsonl))
+        with HostDatasetWriter(tmp_path / "data", datetime(2026, 10, 3, tzinfo=timezone.utc)) as w:
+            for host in hosts[3:5]:
+                w.write(host)
+
+        loaded = list(load_hosts([jsonl, tmp_path / "data"]))
+        assert sorted((h.ip, h.query) for h in loaded) == sorted(
+            (h.ip, h.query) for h in hosts[:5]
+        )
+        assert len(HostIndex.from_hosts(loaded)) == 5
+
+    def test_date_is_the_scan_date(self, tmp_path):
+        # Banners crawled on different days, stored by one scan on 2026-10-05.
+        hosts = _hosts()[:4]
+        with HostDatasetWriter(tmp_path / "data", datetime(2026, 10, 5, tzinfo=timezone.utc)) as w:
+            for host in hosts:
+                w.write(host)
+
+        loaded = list(load_hosts([tmp_path / "data"]))
+        assert {h.scan_timestamp for h in loaded} == {"2026-10-05T00:00:00+00:00"}
+        index = HostIndex.from_hosts(loaded)
+        assert index.values["date"] == ["2026-10-05"]
+        assert len(index.select({"date": ["2026-10-05"]})) == 4
+
+    def test_same_host_in_two_scans_counts_per_scan_date(self):
+        host = _hosts()[0]
+        scans = [
+            HostRecord(**{**host.to_dict(), "scan_timestamp": f"2026-10-0{day}T00:00:00+00:00"})
+            for day in (5, 6)
+        ]
+        index = HostIndex.from_hosts(scans)
+        assert dict(index.counts("date")) == {"2026-10-05": 1, "2026-10-06": 1}
@@ -2,7 +2,15 @@
 
 from datetime import datetime, timezone
 
-from openclaw_tracker.models import CityCount, CountryCount, QueryResult, ScanResult
+from openclaw_tracker.models import (
+    CityCount,
+    CountryCount,
+    FacetCount,
+    HostRecord,
+    QueryResult,
+    ScanResult,
+    VersionCount,
+)
 
 
 class TestCountryCount:
@@ -20,6 +28,17 @@ class TestCityCount:
         assert cc.count == 7
 
 
+class TestHostRecord:
+    def test_round_trip(self):
+        host = HostRecord(ip="192.0.2.1", port=18789, country_code="DE", city="Berlin")
+        assert HostRecord.from_dict(host.to_dict()) == host
+
+    def test_from_dict_ignores_unknown_keys(self):
+        host = HostRecord.from_dict({"ip": "192.0.2.1", "port": 80, "extra": 1})
+        assert host.ip == "192.0.2.1"
+        assert host.port == 80
+
+
 class TestQueryResult:
     def test_construction_defaults(self):
         qr = QueryResult(query="test query", total=10)
@@ -87,4 +106,47 @@ class TestScanResult:
         assert d["countries"] == []
         assert d["cities"] == []
         assert d["per_query"] == []
+        assert d["versions"] == []
+        assert d["facets"] == {}
         assert "timestamp" in d
+
+    def test_to_dict_versions(self):
+        sr = ScanResult(versions=[VersionCount("OpenClaw", "1.4.2", 3)])
+        d = sr.to_dict()
+        assert d["versions"] == [
+            {"product": "OpenClaw", "version": "1.4.2", "count": 3}
+        ]
+
+    def test_to_dict_facets(self):
+        sr = ScanResult(facets={"org": [FacetCount("Example Hosting", 4)]})
+        d = sr.to_dict()
+        assert d["facets"] == {"org": [{"value": "Example Hosting", "count": 4}]}
+
+    def test_from_dict_round_trip(self):
+        ts = datetime(2025, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+        sr = ScanResult(
+            queries_run=["q1"],
+            total_instances=10,
+            countries=[CountryCount("US", "United States", 7)],
+            cities=[CityCount("NYC", 5)],
+            query_results=[
+                QueryResult(
+                    query="q1",
+                    total=10,
+                    countries=[CountryCount("US", "United States", 7)],
+                    cities=[CityCount("NYC", 5)],
+                ),
+            ],
+            versions=[VersionCount("OpenClaw", "1.4.2", 3)],
+            facets={"port": [FacetCount("18789", 9)], "org": [FacetCount("Example", 5, 2)]},
+            timestamp=ts,
+        )
+        assert ScanResult.from_dict(sr.to_dict()) == sr
+
+    def test_from_dict_older_snapshot(self):
+        sr = ScanResult.from_dict(
+            {"timestamp": "2025-01-15T12:00:00+00:00", "total_instances": 3}
+        )
+        assert sr.total_instances == 3
+        assert sr.versions == []
+        assert sr.facets == {}
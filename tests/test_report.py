@@ -0,0 +1,76 @@
+"""Tests for the static HTML report."""
+
+import base64
+import gzip
+import json
+import re
+from datetime import datetime, timezone
+
+from openclaw_tracker.models import CityCount, CountryCount, QueryResult, ScanResult
+from openclaw_tracker.report import PLOTLY_BUNDLE, render_html, write_html_report
+
+
+def _scan() -> ScanResult:
+    qrs = [
+        QueryResult(
+            query='title:"OpenClaw <Control>"',
+            total=30,
+            countries=[
+                CountryCount("US", "United States", 20),
+                CountryCount("DE", "Germany", 10),
+            ],
+            cities=[CityCount("Berlin", 10)],
+        ),
+        QueryResult(query="port:18789", total=0),
+    ]
+    return ScanResult(
+        queries_run=[qr.query for qr in qrs],
+        total_instances=30,
+        countries=list(qrs[0].countries),
+        cities=list(qrs[0].cities),
+        query_results=qrs,
+        timestamp=datetime(2026, 10, 19, 12, tzinfo=timezone.utc),
+    )
+
+
+def _figures(page: str) -> dict:
+    match = re.search(r'<script id="figures" type="application/json">(.*?)</script>', page)
+    encoded = json.loads(match.group(1))
+    return {k: json.loads(gzip.decompress(base64.b64decode(v))) for k, v in encoded.items()}
+
+
+class TestRenderHtml:
+    def test_embeds_compressed_figures(self):
+        page = render_html(_scan())
+        figures = _figures(page)
+        # Map, top countries, top cities, and per-query countries and cities.
+        assert len(figures) == 5
+        assert figures["f0"]["data"][0]["type"] == "choropleth"
+        assert all(f'data-figure="{k}"' in page for k in figures)
+
+    def test_per_query_sections_and_escaping(self):
+        page = render_html(_scan())
+        assert page.count("<details>") == 2
+        assert "title:&quot;OpenClaw &lt;Control&gt;&quot;" in page
+        assert "<Control>" not in page
+        assert "No country results for this query." in page
+
+    def test_loads_plotly_bundle_once(self):
+        page = render_html(_scan())
+        assert page.count(f'<script src="{PLOTLY_BUNDLE}"></script>') == 1
+
+
+class TestWriteHtmlReport:
+    def test_writes_site(self, tmp_path):
+        index = write_html_report(_scan(), tmp_path / "out")
+        assert index == tmp_path / "out" / "index.html"
+        assert (tmp_path / "out" / PLOTLY_BUNDLE).stat().st_size > 1_000_000
+        scan = json.loads((tmp_path / "out" / "scan.json").read_text())
+        assert scan["total_instances"] == 30
+
+    def test_bundle_is_not_rewritten(self, tmp_path):
+        write_html_report(_scan(), tmp_path)
+        bundle = tmp_path / PLOTLY_BUNDLE
+        mtime = bundle.stat().st_mtime_ns
+        write_html_report(_scan(), tmp_path)
+        assert bundle.stat().st_mtime_ns == mtime
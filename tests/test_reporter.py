@@ -1,11 +1,14 @@
 """Tests for reporter module."""
 
+import io
 import json
 from datetime import datetime, timezone
 from pathlib import Path
 
-from openclaw_tracker.models import CityCount, CountryCount, ScanResult
-from openclaw_tracker.reporter import _bar, write_json
+import pytest
+
+from openclaw_tracker.models import CityCount, CountryCount, QueryResult, ScanResult
+from openclaw_tracker.reporter import RowWriter, _bar, write_json
 
 
 class TestBar:
@@ -59,3 +62,54 @@ class TestWriteJson:
         data = json.loads(out.read_text())
         assert data["total_instances"] == 0
         assert data["countries"] == []
+
+
+class TestRowWriter:
+    def _query(self) -> QueryResult:
+        return QueryResult(
+            query="q1",
+            total=5,
+            countries=[CountryCount("US", "United States", 5)],
+            cities=[CityCount("New York, NY", 3)],
+        )
+
+    def test_csv_header_and_quoting(self):
+        out = io.StringIO()
+        writer = RowWriter("csv", out)
+        writer.write_query(self._query())
+
+        lines = out.getvalue().splitlines()
+        assert lines[0] == "query,dimension,key,name,count"
+        assert lines[1] == "q1,total,,,5"
+        assert lines[2] == "q1,country,US,United States,5"
+        assert lines[3] == 'q1,city,"New York, NY","New York, NY",3'
+
+    def test_tsv(self):
+        out = io.StringIO()
+        RowWriter("tsv", out).write_query(self._query())
+        assert out.getvalue().splitlines()[2] == "q1\tcountry\tUS\tUnited States\t5"
+
+    def test_ndjson_streams_queries_then_merged(self):
+        out = io.StringIO()
+        writer = RowWriter("ndjson", out)
+        writer.write_query(self._query())
+        first = out.getvalue()
+        assert first.count("\n") == 3
+
+        writer.write_merged(
+            ScanResult(total_instances=5, countries=[CountryCount("US", "United States", 5)])
+        )
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert rows[0] == {
+            "query": "q1",
+            "dimension": "total",
+            "key": "",
+            "name": "",
+            "count": 5,
+        }
+        assert rows[-2]["query"] == "*"
+        assert rows[-1]["dimension"] == "country"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            RowWriter("xml", io.StringIO())
@@ -0,0 +1,159 @@
+"""Tests for the JSON HTTP API server."""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from openclaw_tracker.models import CityCount, CountryCount, QueryResult, ScanResult
+from openclaw_tracker.reporter import write_json
+from openclaw_tracker.server import APIServer, ResultStore, build_routes, respond
+
+
+def _result(hour: int, us: int) -> ScanResult:
+    return ScanResult(
+        queries_run=["q1"],
+        total_instances=us + 1,
+        countries=[CountryCount("US", "United States", us), CountryCount("DE", "Germany", 1)],
+        cities=[CityCount("NYC", us)],
+        query_results=[QueryResult(query="q1", total=us + 1)],
+        timestamp=datetime(2025, 1, 15, hour, 0, 0, tzinfo=timezone.utc),
+    )
+
+
+def _parse(raw: bytes) -> tuple[int, dict[str, str], bytes]:
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status_line, *lines = head.decode("latin-1").split("\r\n")
+    headers = {k.lower(): v.strip() for k, v in (line.split(":", 1) for line in lines)}
+    return int(status_line.split(" ")[1]), headers, body
+
+
+class TestRoutes:
+    def test_latest_history_and_trends(self):
+        routes = build_routes([_result(11, 5), _result(12, 7)])
+
+        latest = json.loads(routes["/api/latest"].body)
+        assert latest["total_instances"] == 8
+        assert json.loads(routes["/api/latest/countries"].body)[0]["count"] == 7
+        assert json.loads(routes["/api/latest/queries"].body)[0]["query"] == "q1"
+
+        history = json.loads(routes["/api/history"].body)
+        assert [h["total_instances"] for h in history] == [6, 8]
+
+        trends = json.loads(routes["/api/trends"].body)
+        assert trends["countries"]["US"] == [5, 7]
+        assert trends["countries"]["DE"] == [1, 1]
+        assert "/api/snapshots/2025-01-15T11:00:00+00:00" in routes
+
+    def test_empty_store_has_no_latest(self):
+        routes = build_routes([])
+        assert "/api/latest" not in routes
+        assert json.loads(routes["/api/history"].body) == []
+
+
+class TestRespond:
+    def setup_method(self):
+        self.routes = build_routes([_result(12, 7)])
+
+    def test_ok_and_etag(self):
+        status, headers, body = _parse(respond(self.routes, "GET", "/api/latest", {}))
+        assert status == 200
+        assert headers["etag"] == self.routes["/api/latest"].etag
+        assert int(headers["content-length"]) == len(body)
+        assert json.loads(body)["total_instances"] == 8
+
+    def test_if_none_match_returns_304(self):
+        etag = self.routes["/api/latest"].etag
+        status, _, body = _parse(
+            respond(self.routes, "GET", "/api/latest", {"if-none-match": f'"x", {etag}'})
+        )
+        assert status == 304
+        assert body == b""
+
+    def test_gzip(self):
+        status, headers, body = _parse(
+            respond(self.routes, "GET", "/api/latest/", {"accept-encoding": "gzip, br"})
+        )
+        assert status == 200
+        assert headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(body))["total_instances"] == 8
+
+    def test_gzip_has_its_own_etag(self):
+        cached = self.routes["/api/latest"]
+        gzip_request = {"accept-encoding": "gzip", "if-none-match": cached.etag}
+        status, headers, _ = _parse(respond(self.routes, "GET", "/api/latest", gzip_request))
+        assert status == 200
+        assert headers["etag"] == cached.gzip_etag != cached.etag
+
+        gzip_request["if-none-match"] = f"W/{cached.gzip_etag}"
+        assert _parse(respond(self.routes, "GET", "/api/latest", gzip_request))[0] == 304
+
+    def test_gzip_q_zero_is_refused(self):
+        for accept in ("gzip;q=0, br", "*;q=0", "identity", "br;q=1, *;q=0.5, gzip; q=0"):
+            _, headers, body = _parse(
+                respond(self.routes, "GET", "/api/latest", {"accept-encoding": accept})
+            )
+            assert "content-encoding" not in headers
+            assert json.loads(body)["total_instances"] == 8
+        _, headers, _ = _parse(
+            respond(self.routes, "GET", "/api/latest", {"accept-encoding": "br, *;q=0.1"})
+        )
+        assert headers["content-encoding"] == "gzip"
+
+    def test_head_has_no_body(self):
+        status, headers, body = _parse(respond(self.routes, "HEAD", "/api/latest", {}))
+        assert status == 200
+        assert int(headers["content-length"]) > 0
+        assert body == b""
+
+    def test_not_found_and_method(self):
+        assert _parse(respond(self.routes, "GET", "/nope", {}))[0] == 404
+        assert _parse(respond(self.routes, "POST", "/api/latest", {}))[0] == 405
+
+
+class TestResultStore:
+    def test_refresh_detects_changes(self, tmp_path: Path):
+        write_json(_result(11, 5), tmp_path / "a.json")
+        (tmp_path / "notes.json").write_text("{}")
+        store = ResultStore(tmp_path)
+
+        assert store.refresh() is True
+        assert store.refresh() is False
+        assert json.loads(store.routes["/api/latest"].body)["total_instances"] == 6
+
+        write_json(_result(12, 7), tmp_path / "b.json")
+        assert store.refresh() is True
+        assert json.loads(store.routes["/api/latest"].body)["total_instances"] == 8
+
+
+class TestAPIServer:
+    def test_keep_alive_round_trip(self, tmp_path: Path):
+        write_json(_result(12, 7), tmp_path / "a.json")
+        store = ResultStore(tmp_path)
+        store.refresh()
+
+        async def scenario() -> list[bytes]:
+            server = await asyncio.start_server(APIServer(store).handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for path in ("/api/latest", "/healthz"):
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+                head = await reader.readuntil(b"\r\n\r\n")
+                _, headers, _ = _parse(head)
+                body = await reader.readexactly(int(headers["content-length"]))
+                responses.append(head + body)
+            writer.write(b"GET /api/latest HTTP/1.1\r\nConnection: close\r\n\r\n")
+            responses.append(await reader.read())
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return responses
+
+        latest, health, closing = asyncio.run(scenario())
+        assert json.loads(_parse(latest)[2])["total_instances"] == 8
+        assert json.loads(_parse(health)[2]) == {"status": "ok", "snapshots": 1}
+        status, headers, _ = _parse(closing)
+        assert status == 200
+        assert headers["connection"] == "close"
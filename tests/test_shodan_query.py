@@ -2,17 +2,22 @@
 
 from unittest.mock import MagicMock
 
-from openclaw_tracker.shodan_query import _country_name, run_all_queries, run_query
+from openclaw_tracker.shodan_query import (
+    country_name,
+    iter_hosts,
+    run_all_queries,
+    run_query,
+)
 
 
 class TestCountryName:
     def test_known_code(self):
-        assert _country_name("US") == "United States"
-        assert _country_name("DE") == "Germany"
+        assert country_name("US") == "United States"
+        assert country_name("DE") == "Germany"
 
     def test_unknown_code_returns_code(self):
-        assert _country_name("ZZ") == "ZZ"
-        assert _country_name("XX") == "XX"
+        assert country_name("ZZ") == "ZZ"
+        assert country_name("XX") == "XX"
 
 
 class TestRunQuery:
@@ -58,6 +63,36 @@ class TestRunQuery:
         assert qr.cities == []
 
 
+class TestIterHosts:
+    def test_flattens_matches_and_respects_limit(self):
+        api = MagicMock()
+        api.search_cursor.return_value = iter([
+            {
+                "ip_str": "192.0.2.1",
+                "port": 18789,
+                "org": "Example Hosting",
+                "asn": "AS64500",
+                "location": {"country_code": "DE", "city": "Berlin"},
+                "http": {"title": "OpenClaw Control", "html": "<html></html>"},
+                "data": "HTTP/1.1 200 OK",
+            },
+            {"ip_str": "192.0.2.2", "port": 443},
+            {"ip_str": "192.0.2.3", "port": 443},
+        ])
+
+        hosts = list(iter_hosts(api, "q", limit=2))
+
+        api.search_cursor.assert_called_once_with("q")
+        assert len(hosts) == 2
+        assert hosts[0].ip == "192.0.2.1"
+        assert hosts[0].query == "q"
+        assert hosts[0].country_code == "DE"
+        assert hosts[0].city == "Berlin"
+        assert hosts[0].title == "OpenClaw Control"
+        assert hosts[1].country_code == ""
+        assert hosts[1].title == ""
+
+
 class TestRunAllQueries:
     def test_merges_results(self):
         call_count = 0
@@ -0,0 +1,115 @@
+"""Tests for streaming heavy-hitter sketches."""
+
+import random
+from collections import Counter
+
+from openclaw_tracker.models import FacetCount, HostRecord
+from openclaw_tracker.sketches import CountMinSketch, HostFacets, SpaceSaving
+
+
+def _zipf_stream(n: int, distinct: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices([f"v{i}" for i in range(distinct)], weights=weights, k=n)
+
+
+class TestCountMinSketch:
+    def test_never_underestimates(self):
+        stream = _zipf_stream(5000, 500)
+        sketch = CountMinSketch(epsilon=0.01, delta=0.01)
+        for value in stream:
+            sketch.add(value)
+
+        exact = Counter(stream)
+        bound = 0.01 * len(stream)
+        for value, count in exact.items():
+            estimate = sketch.estimate(value)
+            assert estimate >= count
+            assert estimate - count <= bound * 3
+
+    def test_unseen_value_is_small(self):
+        sketch = CountMinSketch()
+        sketch.add("a", 10)
+        assert sketch.estimate("never-seen") == 0
+        assert sketch.total == 10
+
+
+class TestSpaceSaving:
+    def test_exact_below_capacity(self):
+        summary = SpaceSaving(capacity=10)
+        for value in ["a", "b", "a", "c", "a", "b"]:
+            summary.add(value)
+        assert summary.top(2) == [("a", 3, 0), ("b", 2, 0)]
+
+    def test_heavy_hitters_within_bound(self):
+        stream = _zipf_stream(20000, 2000)
+        summary = SpaceSaving(capacity=100)
+        for value in stream:
+            summary.add(value)
+
+        exact = Counter(stream)
+        bound = summary.error_bound
+        assert bound == len(stream) // 100
+        top = summary.top(10)
+        for value, count, error in top:
+            assert exact[value] <= count <= exact[value] + bound
+            assert count - error <= exact[value]
+
+        # Every value above the bound must be tracked.
+        tracked = {value for value, _, _ in summary.top(100)}
+        for value, count in exact.items():
+            if count > bound:
+                assert value in tracked
+
+    def test_memory_is_bounded(self):
+        summary = SpaceSaving(capacity=5)
+        for i in range(1000):
+            summary.add(f"v{i}")
+        assert len(summary.top(100)) == 5
+
+
+class TestHostFacets:
+    def _hosts(self) -> list[HostRecord]:
+        return [
+            HostRecord(ip="192.0.2.1", port=18789, country_code="US", city="NYC", org="A"),
+            HostRecord(ip="192.0.2.2", port=18789, country_code="US", city="NYC", org="A"),
+            HostRecord(ip="192.0.2.3", port=443, country_code="DE", city="Berlin", org="B"),
+        ]
+
+    def test_org_counts_are_exact_below_capacity(self):
+        facets = HostFacets(capacity=10)
+        for host in self._hosts():
+            facets.add(host)
+
+        assert facets.top("org", 5) == [FacetCount("A", 2), FacetCount("B", 1)]
+        assert facets.hosts_seen == 3
+
+    def test_reports_error_above_capacity(self):
+        # A one-cell Count-Min sketch cannot tighten the Space-Saving estimates.
+        facets = HostFacets(capacity=2, epsilon=3.0, delta=0.5)
+        orgs = ["A"] * 5 + ["B", "C", "D"]
+        for i, org in enumerate(orgs):
+            facets.add(HostRecord(ip=f"192.0.2.{i}", port=443, org=org))
+
+        top = facets.top("org", 2)
+        assert top[0] == FacetCount("A", 5)
+        assert top[1].error > 0
+        truth = Counter(orgs)
+        for f in top:
+            assert f.count - f.error <= truth[f.value] <= f.count
+
+    def test_port_and_empty_values(self):
+        facets = HostFacets(capacity=10)
+        for host in self._hosts():
+            facets.add(host)
+        assert [(f.value, f.count) for f in facets.top("port", 5)] == [
+            ("18789", 2),
+            ("443", 1),
+        ]
+        assert not facets.top("asn", 5)
+
+    def test_consume_passes_hosts_through(self):
+        facets = HostFacets(capacity=10)
+        hosts = self._hosts()
+        assert list(facets.consume(hosts)) == hosts
+        assert facets.hosts_seen == 3
@@ -0,0 +1,258 @@
+"""Tests for pluggable data sources and the concurrent fan-out."""
+
+import json
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+
+from openclaw_tracker.models import CountryCount, HostRecord, QueryResult, ScanResult
+from openclaw_tracker.sources import (
+    FileSource,
+    QueryTerm,
+    ShodanSource,
+    iter_source_hosts,
+    matches,
+    parse_query,
+    read_scan_dump,
+    run_sources,
+    source_from_spec,
+)
+
+
+def _host(ip: str, port: int = 18789, **kwargs) -> HostRecord:
+    return HostRecord(ip=ip, port=port, **kwargs)
+
+
+def _write_jsonl(path, hosts: list[HostRecord]) -> None:
+    path.write_text("".join(json.dumps(h.to_dict()) + "\n" for h in hosts), encoding="utf-8")
+
+
+class TestQuery:
+    def test_parse_query(self):
+        assert parse_query('title:"OpenClaw Control" port:18789 -country:CN openclaw') == [
+            QueryTerm("title", "OpenClaw Control", False),
+            QueryTerm("port", "18789", False),
+            QueryTerm("country", "CN", True),
+            QueryTerm("", "openclaw", False),
+        ]
+
+    def test_matches(self):
+        host = _host(
+            "192.0.2.1", title="OpenClaw Control", country_code="US", banner="HTTP/1.1 200 OK"
+        )
+        assert matches(host, parse_query('title:"OpenClaw Control"'))
+        assert matches(host, parse_query("port:18789 openclaw"))
+        assert not matches(host, parse_query("port:80 openclaw"))
+        assert not matches(host, parse_query('title:"OpenClaw Control" -country:US'))
+        assert not matches(host, parse_query('title:"Moltbot Control"'))
+
+
+class TestReadScanDump:
+    def test_masscan(self, tmp_path):
+        path = tmp_path / "masscan.json"
+        path.write_text(
+            "[\n"
+            '{"ip": "192.0.2.1", "timestamp": "1792411200", "ports": [{"port": 18789, '
+            '"proto": "tcp", "service": {"name": "http", '
+            '"banner": "<html><title>OpenClaw Control</title></html>"}}]},\n'
+            '{"ip": "192.0.2.2", "timestamp": "1792411200", "ports": [{"port": 22}]},\n'
+            "]\n",
+            encoding="utf-8",
+        )
+        hosts = list(read_scan_dump(path))
+        assert [(h.ip, h.port) for h in hosts] == [("192.0.2.1", 18789), ("192.0.2.2", 22)]
+        assert hosts[0].title == "OpenClaw Control"
+        assert hosts[0].timestamp.startswith("2026-10-19T")
+
+    def test_zgrab(self, tmp_path):
+        record = {
+            "ip": "192.0.2.3",
+            "data": {
+                "http": {
+                    "status": "success",
+                    "timestamp": "2026-10-19T12:00:00Z",
+                    "result": {
+                        "response": {
+                            "status_code": 200,
+                            "headers": {"server": ["openclaw/1.4.2"]},
+                            "body": "<title>OpenClaw Control</title>",
+                            "request": {"url": {"scheme": "http", "host": "192.0.2.3:18789"}},
+                        }
+                    },
+                }
+            },
+        }
+        failed = {"ip": "192.0.2.4", "data": {"http": {"status": "connection-timeout"}}}
+        path = tmp_path / "zgrab.jsonl"
+        path.write_text(json.dumps(record) + "\n" + json.dumps(failed) + "\n", encoding="utf-8")
+        [host] = read_scan_dump(path)
+        assert (host.ip, host.port, host.title) == ("192.0.2.3", 18789, "OpenClaw Control")
+        assert "Server: openclaw/1.4.2" in host.banner
+
+    def test_host_records(self, tmp_path):
+        path = tmp_path / "hosts.jsonl"
+        hosts = [_host("192.0.2.1", country_code="US"), _host("192.0.2.2", country_code="DE")]
+        _write_jsonl(path, hosts)
+        assert list(read_scan_dump(path)) == hosts
+
+    def test_shodan_banners(self, tmp_path):
+        banner = {
+            "ip_str": "192.0.2.5",
+            "port": 18789,
+            "data": "HTTP/1.1 200 OK",
+            "location": {"country_code": "US", "city": "Ashburn"},
+            "http": {"title": "OpenClaw Control"},
+        }
+        path = tmp_path / "shodan.json"
+        path.write_text(json.dumps(banner) + "\n", encoding="utf-8")
+        [host] = read_scan_dump(path)
+        assert (host.ip, host.port, host.country_code) == ("192.0.2.5", 18789, "US")
+        assert (host.title, host.banner) == ("OpenClaw Control", "HTTP/1.1 200 OK")
+
+    def test_unknown_record_names_file_and_line(self, tmp_path):
+        path = tmp_path / "bad.jsonl"
+        path.write_text('{"ip": "192.0.2.1", "port": 80}\n{"hello": 1}\n', encoding="utf-8")
+        with pytest.raises(ValueError, match=r"bad\.jsonl:2: not a host record"):
+            list(read_scan_dump(path))
+
+
+class TestFileSource:
+    @pytest.fixture
+    def source(self, tmp_path) -> FileSource:
+        path = tmp_path / "hosts.jsonl"
+        _write_jsonl(
+            path,
+            [
+                _host("192.0.2.1", country_code="US", city="Ashburn", title="OpenClaw Control"),
+                _host("192.0.2.2", country_code="US", city="Dallas", title="OpenClaw Control"),
+                _host("192.0.2.3", country_code="DE", city="Berlin", title="Moltbot Control"),
+                # Repeated sighting: counted once.
+                _host("192.0.2.1", country_code="US", city="Ashburn", title="OpenClaw Control"),
+            ],
+        )
+        return FileSource([path])
+
+    def test_count(self, source):
+        qr = source.count('title:"OpenClaw Control"', top_n=10)
+        assert qr.total == 2
+        assert qr.countries == [CountryCount("US", "United States", 2)]
+        assert {c.city for c in qr.cities} == {"Ashburn", "Dallas"}
+
+    def test_hosts_are_tagged_with_query(self, source):
+        hosts = list(source.hosts("port:18789", limit=2))
+        assert len(hosts) == 2
+        assert all(h.query == "port:18789" for h in hosts)
+
+
+class _SlowSource:
+    """Source that yields many hosts, to exercise backpressure and early close."""
+
+    name = "slow"
+
+    def count(self, query: str, top_n: int) -> QueryResult:
+        return QueryResult(query=query, total=1)
+
+    def hosts(self, query: str, limit: int | None = None) -> Iterator[HostRecord]:
+        for i in range(limit or 10_000):
+            yield _host(f"198.51.100.{i % 250}", port=1000 + i, query=query)
+
+
+class TestFanOut:
+    @pytest.fixture
+    def sources(self, tmp_path) -> list[FileSource]:
+        first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+        _write_jsonl(
+            first,
+            [
+                _host("192.0.2.1", country_code="US", title="OpenClaw Control"),
+                _host("192.0.2.2", country_code="DE", title="OpenClaw Control"),
+            ],
+        )
+        _write_jsonl(
+            second,
+            [
+                _host("192.0.2.1", country_code="US", title="OpenClaw Control"),
+                _host("192.0.2.9", country_code="US", title="Moltbot Control"),
+            ],
+        )
+        return [FileSource([first], name="a"), FileSource([second], name="b")]
+
+    def test_run_sources_dedups_file_sources(self, sources):
+        seen = []
+        result = run_sources(
+            sources,
+            queries=['title:"OpenClaw Control"', 'title:"Moltbot Control"'],
+            on_result=seen.append,
+        )
+        assert sorted(qr.query for qr in seen) == [
+            'title:"Moltbot Control"',
+            'title:"OpenClaw Control"',
+        ]
+        # 192.0.2.1 is in both dumps but counted once.
+        assert [qr.total for qr in result.query_results] == [2, 1]
+        assert result.total_instances == 3
+        assert {c.country_code: c.count for c in result.countries} == {"US": 2, "DE": 1}
+        assert not any(qr.upper_bound for qr in result.query_results)
+
+    def test_run_sources_flags_summed_counts_as_upper_bounds(self, sources):
+        result = run_sources([*sources, _SlowSource()], queries=['title:"OpenClaw Control"'])
+        [qr] = result.query_results
+        assert (qr.total, qr.upper_bound) == (3, True)
+        assert ScanResult.from_dict(result.to_dict()).query_results[0].upper_bound
+
+    def test_run_sources_shodan_concurrent_queries(self, monkeypatch):
+        def fake_count(query, facets=None):
+            total = {"q1": 1, "q2": 2, "q3": 3}[query]
+            return {"total": total, "facets": {"country": [{"value": "US", "count": total}]}}
+
+        mock_api = MagicMock()
+        mock_api.count.side_effect = fake_count
+        monkeypatch.setattr("shodan.Shodan", MagicMock(return_value=mock_api))
+        seen = []
+        result = run_sources(
+            [ShodanSource("fake-key")],
+            queries=["q1", "q2", "q3"],
+            on_result=lambda qr: seen.append(qr.query),
+            per_source_workers=3,
+        )
+        assert sorted(seen) == ["q1", "q2", "q3"]
+        assert [qr.query for qr in result.query_results] == ["q1", "q2", "q3"]
+        assert result.total_instances == 6
+        assert result.countries[0].count == 6
+
+    def test_iter_source_hosts_dedups_across_sources(self, sources):
+        hosts = list(iter_source_hosts(sources, ['title:"OpenClaw Control"']))
+        assert sorted(h.ip for h in hosts) == ["192.0.2.1", "192.0.2.2"]
+
+    def test_iter_source_hosts_early_close(self):
+        stream = iter_source_hosts([_SlowSource(), _SlowSource()], ["q"])
+        first = [next(stream) for _ in range(10)]
+        stream.close()
+        assert len(first) == 10
+
+    def test_iter_source_hosts_reraises_source_errors(self):
+        class Broken(_SlowSource):
+            def hosts(self, query, limit=None):
+                yield _host("192.0.2.1", query=query)
+                raise OSError("connection reset")
+
+        with pytest.raises(OSError, match="connection reset"):
+            list(iter_source_hosts([Broken()], ["q"]))
+
+
+class TestSourceFromSpec:
+    def test_file_glob(self, tmp_path):
+        _write_jsonl(tmp_path / "a.jsonl", [_host("192.0.2.1")])
+        _write_jsonl(tmp_path / "b.jsonl", [_host("192.0.2.2")])
+        source = source_from_spec(f"file:{tmp_path}/*.jsonl")
+        assert isinstance(source, FileSource)
+        assert len(source.records) == 2
+
+    @pytest.mark.parametrize(
+        ("spec", "message"),
+        [("shodan", "API key"), ("file:/nonexistent/*.jsonl", "no files"), ("censys", "unknown")],
+    )
+    def test_errors(self, spec, message):
+        with pytest.raises(ValueError, match=message):
+            source_from_spec(spec)
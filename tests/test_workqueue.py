@@ -0,0 +1,126 @@
+"""Tests for the SQLite work queue and distributed scan workers."""
+
+from unittest.mock import MagicMock
+
+from openclaw_tracker.models import FacetCount
+from openclaw_tracker.workqueue import PAGE_SIZE, WorkQueue, collect, plan_scan, run_worker
+
+
+def _fake_api():
+    api = MagicMock()
+
+    def count(query, facets):
+        name, _ = facets[0]
+        values = {
+            "country": [{"value": "US", "count": 150}, {"value": "DE", "count": 50}],
+            "city": [{"value": "Berlin", "count": 50}],
+            "org": [{"value": "Hetzner", "count": 30}],
+            "asn": [{"value": "AS24940", "count": 30}],
+            "port": [{"value": 18789, "count": 200}],
+        }[name]
+        return {"total": 200, "facets": {name: values}}
+
+    def search(query, page):
+        # Every query pages through the same full pages of hosts.
+        return {
+            "matches": [
+                {
+                    "ip_str": f"10.0.{page}.{i}",
+                    "port": 18789,
+                    "org": "HostCo",
+                    "http": {"title": f"OpenClaw Control v1.{page}.0"},
+                }
+                for i in range(PAGE_SIZE)
+            ]
+        }
+
+    api.count.side_effect = count
+    api.search.side_effect = search
+    return api
+
+
+class TestWorkQueue:
+    def test_submit_is_idempotent(self, tmp_path):
+        with WorkQueue(tmp_path / "q.db") as wq:
+            assert wq.submit("facet", {"query": "a", "facet": "country"})
+            assert not wq.submit("facet", {"facet": "country", "query": "a"})
+            assert wq.status_counts() == {"pending": 1}
+
+    def test_claim_complete_and_follow_ups(self, tmp_path):
+        with WorkQueue(tmp_path / "q.db") as wq:
+            wq.submit("facet", {"query": "a"})
+            task = wq.claim("w1")
+            assert task.attempts == 1
+            assert wq.claim("w2") is None
+            assert wq.complete(task.id, "w1", {"total": 1}, [("page", {"page": 1})])
+            assert wq.result(task.id) == {"total": 1}
+            assert wq.status_counts() == {"done": 1, "pending": 1}
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        with WorkQueue(tmp_path / "q.db", lease_seconds=-1) as wq:
+            wq.submit("facet", {"query": "a"})
+            crashed = wq.claim("w1")
+            task = wq.claim("w2")
+            assert task.id == crashed.id
+            assert task.attempts == 2
+            # The crashed worker can no longer heartbeat or complete it.
+            assert not wq.heartbeat(crashed.id, "w1")
+            assert not wq.complete(crashed.id, "w1", "stale")
+            assert wq.complete(task.id, "w2", "fresh")
+            assert wq.result(task.id) == "fresh"
+
+    def test_fail_retries_then_gives_up(self, tmp_path):
+        with WorkQueue(tmp_path / "q.db", max_attempts=2) as wq:
+            wq.submit("facet", {"query": "a"})
+            for _ in range(2):
+                task = wq.claim("w1")
+                wq.fail(task.id, "w1", "boom")
+            assert wq.claim("w1") is None
+            assert wq.status_counts() == {"failed": 1}
+            assert wq.is_drained()
+
+
+class TestDistributedScan:
+    def test_workers_produce_one_scan_result(self, tmp_path, monkeypatch):
+        api = _fake_api()
+        monkeypatch.setattr("shodan.Shodan", MagicMock(return_value=api))
+        db = tmp_path / "scan.db"
+
+        with WorkQueue(db) as wq:
+            # 2 queries x (country, city); host facets come from the pages.
+            assert plan_scan(wq, ["q1", "q2"], top_n=5, host_limit=150, facets=True) == 4
+            assert plan_scan(wq, ["q1", "q2"], top_n=5, host_limit=150, facets=True) == 0
+
+        # 4 facet tasks + 2 pages per query + one enrich task per page.
+        assert run_worker(db, "key", worker_id="w1", poll_interval=0) == 12
+
+        with WorkQueue(db) as wq:
+            assert wq.status_counts() == {"done": 12}
+            result = collect(wq)
+
+        assert result.queries_run == ["q1", "q2"]
+        assert result.total_instances == 400
+        assert [c.country_code for c in result.countries] == ["US", "DE"]
+        assert result.countries[0].count == 300
+        # Both queries page through the same hosts, and the second page is cut
+        # at the host limit; each service is counted once.
+        assert result.facets["org"] == [FacetCount("HostCo", 150)]
+        assert {(v.product, v.version, v.count) for v in result.versions} == {
+            ("OpenClaw", "1.1.0", 100),
+            ("OpenClaw", "1.2.0", 50),
+        }
+
+    def test_count_api_facets_are_upper_bounds(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("shodan.Shodan", MagicMock(return_value=_fake_api()))
+        db = tmp_path / "scan.db"
+        with WorkQueue(db) as wq:
+            # 2 queries x (country, city, org, asn, port)
+            assert plan_scan(wq, ["q1", "q2"], top_n=5, facets=True) == 10
+        run_worker(db, "key", worker_id="w1", poll_interval=0)
+
+        with WorkQueue(db) as wq:
+            result = collect(wq)
+
+        # Summed over two queries that may match the same hosts.
+        assert result.facets["org"] == [FacetCount("Hetzner", 60, 30)]
+        assert not result.versions